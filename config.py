@@ -1,323 +1,469 @@
-# config.py
-import os
-from dotenv import load_dotenv
-from dataclasses import dataclass, field
-from typing import Optional, Dict, List, Union
-import logging
-import json
-import yaml
-from pathlib import Path
-from pydantic import BaseModel, validator, ValidationError
-import asyncio
-
-logger = logging.getLogger(__name__)
-
-class ConfigError(Exception):
-    """Custom exception for configuration errors."""
-    pass
-
-class DatabaseConfig(BaseModel):
-    URI: str
-    DB_NAME: str
-    COLLECTION_PREFIX: str = "bot_"
-    MAX_POOL_SIZE: int = 10
-    TIMEOUT_MS: int = 5000
-
-    @validator('URI')
-    def validate_uri(cls, v):
-        if not v.startswith(('mongodb://', 'mongodb+srv://')):
-            raise ValueError("Database URI must start with 'mongodb://' or 'mongodb+srv://'")
-        return v
-
-class TwitchConfig(BaseModel):
-     OAUTH_TOKEN: str
-     CHANNEL: str
-     BOT_NAME: str
-     BROADCASTER_ID: str
-     PREFIX: str = "!"
-     RATE_LIMIT: int = 20
-     MESSAGE_LIMIT: int = 500
-     IGNORE_LIST: List[str] = field(default_factory=list)
-
-     @validator('OAUTH_TOKEN')
-     def validate_oauth(cls, v):
-         if not v.startswith('oauth:'):
-             raise ValueError("Twitch OAuth token must start with 'oauth:'")
-         return v
-
-class OpenAIConfig(BaseModel):
-    API_KEY: str
-    MODEL: str = "gpt-4o-mini" # Changed to gpt-4o-mini
-    MAX_TOKENS: int = 150
-    TEMPERATURE: float = 0.7
-
-class VoiceConfig(BaseModel):
-    ENABLED: bool = True
-    PREFIX: str = "Hey Overlord"
-    COMMAND_TIMEOUT: float = 5.0
-    PHRASE_LIMIT: float = 10.0
-    LANGUAGE: str = "en-US"
-    CONFIDENCE_THRESHOLD: float = 0.7
-
-    @validator('COMMAND_TIMEOUT')
-    def validate_command_timeout(cls, v):
-        if v <= 0:
-            raise ValueError("Command timeout must be a positive number.")
-        return v
-
-    @validator('PHRASE_LIMIT')
-    def validate_phrase_limit(cls, v):
-        if v <= 0:
-            raise ValueError("Phrase limit must be a positive number.")
-        return v
-
-class StreamerBotConfig(BaseModel):
-    WS_URI: str
-    RECONNECT_ATTEMPTS: int = 5
-    HEARTBEAT_INTERVAL: int = 20
-
-    @validator('WS_URI')
-    def validate_ws_uri(cls, v):
-        if not v.startswith('ws://'):
-            raise ValueError("WebSocket URI must start with 'ws://'")
-        return v
-
-    @validator('RECONNECT_ATTEMPTS')
-    def validate_reconnect_attempts(cls, v):
-        if v <= 0:
-            raise ValueError("Reconnect attempts must be a positive number.")
-        return v
-
-    @validator('HEARTBEAT_INTERVAL')
-    def validate_heartbeat_interval(cls, v):
-        if v <= 0:
-            raise ValueError("Heartbeat interval must be a positive number.")
-        return v
-
-class LittleNavMapConfig(BaseModel):
-    BASE_URL: str = "http://localhost:8965"
-    UPDATE_INTERVAL: float = 1.0
-    CACHE_TTL: int = 30
-
-    @validator('UPDATE_INTERVAL')
-    def validate_update_interval(cls, v):
-        if v <= 0:
-            raise ValueError("Update interval must be a positive number.")
-        return v
-
-    @validator('CACHE_TTL')
-    def validate_cache_ttl(cls, v):
-        if v <= 0:
-            raise ValueError("Cache TTL must be a positive number.")
-        return v
-
-class AviationWeatherConfig(BaseModel):
-    BASE_URL: str = "https://api.checkwx.com/metar"
-    TIMEOUT_MS: int = 5000
-
-
-@dataclass
-class Config:
-    twitch: TwitchConfig
-    database: DatabaseConfig
-    openai: OpenAIConfig
-    voice: VoiceConfig
-    streamerbot: StreamerBotConfig
-    littlenavmap: LittleNavMapConfig
-    aviationweather: AviationWeatherConfig
-    bot_trigger_words: List[str] = field(default_factory=lambda: ["bot", "assistant"])
-    bot_personality: str = "You are an AI Overlord managing a flight simulation Twitch channel."
-    verbose: bool = False
-    environment: str = field(default_factory=lambda: os.getenv('ENV', 'development'))
-    command_cooldowns: Dict[str, int] = field(default_factory=dict)
-    custom_commands_enabled: bool = True
-    log_level: str = "INFO"
-    sentry_dsn: Optional[str] = None
-    checkwx_api_key: Optional[str] = None
-    openweathermap_api_key: Optional[str] = None
-    command_permissions: Dict[str, Dict[str, Union[bool, List[str]]]] = field(default_factory=dict)
-    _file_path: Optional[str] = None
-    logger: logging.Logger = field(default_factory=lambda: logging.getLogger(__name__))
-
-    def __post_init__(self):
-        self.validate()
-        self.setup_derived_values()
-        self.load_command_permissions()
-        if self._file_path:
-            self.logger.info(f"Configuration loaded from file: {self._file_path}")
-
-    def validate(self):
-        """Validate configuration values."""
-        if self.environment not in ['development', 'production', 'testing']:
-            raise ConfigError("Invalid environment specified")
-
-    def setup_derived_values(self):
-        """Set up any derived configuration values."""
-        self.is_production = self.environment == 'production'
-        self.is_development = self.environment == 'development'
-        self.is_testing = self.environment == 'testing'
-
-    @classmethod
-    def load_from_env(cls) -> 'Config':
-        """Load configuration from environment variables."""
-        load_dotenv()
-        
-        try:
-            twitch_config = TwitchConfig(
-                OAUTH_TOKEN=os.getenv('TWITCH_OAUTH_TOKEN'),
-                CHANNEL=os.getenv('TWITCH_CHANNEL'),
-                BOT_NAME=os.getenv('BOT_NAME'),
-                BROADCASTER_ID=os.getenv('BROADCASTER_ID'),
-                PREFIX=os.getenv('BOT_PREFIX', '!')
-            )
-
-            database_config = DatabaseConfig(
-                URI=os.getenv('MONGO_URI'),
-                DB_NAME=os.getenv('MONGO_DB_NAME')
-            )
-
-            openai_config = OpenAIConfig(
-                API_KEY=os.getenv('CHATGPT_API_KEY'),
-                MODEL=os.getenv('OPENAI_MODEL', 'gpt-4o-mini') # Changed to gpt-4o-mini
-            )
-
-            voice_config = VoiceConfig(
-                ENABLED=os.getenv('VOICE_ENABLED', 'True').lower() == 'true',
-                PREFIX=os.getenv('VOICE_PREFIX', 'Hey Overlord'),
-                COMMAND_TIMEOUT=float(os.getenv('VOICE_COMMAND_TIMEOUT', '5')),
-                PHRASE_LIMIT=float(os.getenv('VOICE_COMMAND_PHRASE_LIMIT', '10')),
-                LANGUAGE=os.getenv('VOICE_COMMAND_LANGUAGE', 'en-US')
-            )
-
-            streamerbot_config = StreamerBotConfig(
-                WS_URI=os.getenv('STREAMERBOT_WS_URI')
-            )
-
-            littlenavmap_config = LittleNavMapConfig(
-                BASE_URL=os.getenv('LITTLENAVMAP_URL', 'http://localhost:8965')
-            )
-            aviationweather_config = AviationWeatherConfig(
-                
-            )
-            
-            openweathermap_api_key = os.getenv('OPENWEATHERMAP_API_KEY')
-            checkwx_api_key = os.getenv('CHECKWX_API_KEY')
-            
-            config_file = os.getenv('CONFIG_FILE')
-
-            return cls(
-                twitch=twitch_config,
-                database=database_config,
-                openai=openai_config,
-                voice=voice_config,
-                streamerbot=streamerbot_config,
-                littlenavmap=littlenavmap_config,
-                aviationweather = aviationweather_config,
-                bot_trigger_words=os.getenv('BOT_TRIGGER_WORDS', 'bot,assistant').split(','),
-                bot_personality=os.getenv('BOT_PERSONALITY', 'You are an AI Overlord managing a flight simulation Twitch channel.'),
-                verbose=os.getenv('VERBOSE', 'False').lower() == 'true',
-                sentry_dsn=os.getenv('SENTRY_DSN'),
-                checkwx_api_key=checkwx_api_key,
-                openweathermap_api_key = openweathermap_api_key,
-                _file_path = config_file,
-                command_permissions = {},
-                logger = logging.getLogger(__name__)
-            )
-
-        except ValidationError as e:
-             logger.error(f"Pydantic validation error: {e}")
-             raise ConfigError(f"Configuration validation failed: {e}")
-        except ValueError as e:
-            logger.error(f"Value error during config loading: {e}")
-            raise ConfigError(f"Configuration loading failed: {e}")
-        except TypeError as e:
-            logger.error(f"Type error during config loading: {e}")
-            raise ConfigError(f"Configuration loading failed: {e}")
-        except Exception as e:
-            logger.error(f"Failed to load configuration: {e}")
-            raise ConfigError(f"Configuration loading failed: {e}")
-
-    @classmethod
-    def load_from_file(cls, file_path: str) -> 'Config':
-        """Load configuration from a YAML file."""
-        try:
-            with open(file_path, 'r') as f:
-                config_data = yaml.safe_load(f)
-            
-            twitch_config = TwitchConfig(**config_data.get('twitch', {}))
-            database_config = DatabaseConfig(**config_data.get('database', {}))
-            openai_config = OpenAIConfig(**config_data.get('openai', {}))
-            voice_config = VoiceConfig(**config_data.get('voice', {}))
-            streamerbot_config = StreamerBotConfig(**config_data.get('streamerbot', {}))
-            littlenavmap_config = LittleNavMapConfig(**config_data.get('littlenavmap', {}))
-            aviationweather_config = AviationWeatherConfig(**config_data.get('aviationweather', {}))
-            
-            openweathermap_api_key = config_data.get('openweathermap_api_key')
-            checkwx_api_key = config_data.get('checkwx_api_key')
-
-            return cls(
-                twitch=twitch_config,
-                database=database_config,
-                openai=openai_config,
-                voice=voice_config,
-                streamerbot=streamerbot_config,
-                littlenavmap=littlenavmap_config,
-                aviationweather = aviationweather_config,
-                bot_trigger_words=config_data.get('bot_trigger_words', ["bot", "assistant"]),
-                bot_personality=config_data.get('bot_personality', 'You are an AI Overlord managing a flight simulation Twitch channel.'),
-                verbose=config_data.get('verbose', False),
-                sentry_dsn=os.getenv('SENTRY_DSN'),
-                checkwx_api_key = checkwx_api_key,
-                openweathermap_api_key = openweathermap_api_key,
-                command_permissions = config_data.get('command_permissions', {}),
-                _file_path = file_path,
-                logger = logging.getLogger(__name__)
-            )
-        except FileNotFoundError as e:
-            logger.error(f"Config file not found at {file_path}: {e}")
-            raise ConfigError(f"Config file not found: {file_path}") from e
-        except yaml.YAMLError as e:
-            logger.error(f"YAML parsing error: {e}")
-            raise ConfigError(f"YAML parsing failed: {e}") from e
-        except ValidationError as e:
-            logger.error(f"Pydantic validation error: {e}")
-            raise ConfigError(f"Configuration validation failed: {e}") from e
-        except ValueError as e:
-            logger.error(f"Value error during config loading: {e}")
-            raise ConfigError(f"Configuration loading failed: {e}") from e
-        except TypeError as e:
-            logger.error(f"Type error during config loading: {e}")
-            raise ConfigError(f"Configuration loading failed: {e}") from e
-        except Exception as e:
-            logger.error(f"Failed to load configuration from file: {e}")
-            raise ConfigError(f"Configuration file loading failed: {e}") from e
-
-    def reload(self):
-        """Reload configuration from file."""
-        if self._file_path:
-            new_config = Config.load_from_file(self._file_path)
-            self.__dict__.update(new_config.__dict__)
-            self.logger.info(f"Configuration reloaded from: {self._file_path}")
-        else:
-            self.logger.warning("No config file path available to reload from.")
-
-    def load_command_permissions(self):
-        """Load command permissions from the configuration."""
-        if self.command_permissions:
-            self.logger.info("Loading command permissions from configuration...")
-            for command_name, permissions in self.command_permissions.items():
-                 self.command_cooldowns[command_name] = permissions.get("cooldown", 0)
-
-def load_config() -> Config:
-    """Load configuration from environment or file."""
-    try:
-        if config_file := os.getenv('CONFIG_FILE'):
-            if Path(config_file).exists():
-                return Config.load_from_file(config_file)
-            else:
-                logger.warning(f"Config file not found at {config_file}, falling back to environment variables.")
-                return Config.load_from_env()
-        return Config.load_from_env()
-    except ConfigError as e:
-        logger.error(f"Failed to load configuration: {e}")
-        raise
\ No newline at end of file
+# config.py
+import os
+import stat
+from dataclasses import dataclass, field, fields
+from typing import Annotated, FrozenSet, Iterable, Optional, Dict, List, Tuple, Union
+import logging
+import json
+import yaml
+import tempfile
+from pathlib import Path
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, ValidationError, field_validator
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+# (cache key, Config) from the last load_config() call
+_CONFIG_CACHE: Optional[tuple] = None
+
+# .env is parsed at most once per process
+_DOTENV_LOADED = False
+
+def _ensure_dotenv():
+    """Load .env into the environment the first time it is needed."""
+    global _DOTENV_LOADED
+    if not _DOTENV_LOADED:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _DOTENV_LOADED = True
+
+# orjson is optional; both helpers work in bytes either way
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = lambda obj: json.dumps(obj).encode()
+
+# Prefer the libyaml-backed loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+def _file_digest(path: str) -> Tuple[int, int]:
+    """Cheap change marker for a config file."""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+def _load_yaml_cached(path: str) -> dict:
+    """Load a YAML file, reusing a JSON copy keyed on the file's mtime when available."""
+    mtime_ns = os.stat(path).st_mtime_ns
+    cache_path = f"{path}.{mtime_ns}.json"
+    try:
+        with open(cache_path, 'rb') as f:
+            return _json_loads(f.read())
+    except (OSError, ValueError):
+        pass
+
+    # Hand libyaml the whole buffer rather than a file object it must call back into
+    with open(path, 'rb') as f:
+        data = yaml.load(f.read(), Loader=_YAML_LOADER)
+
+    # Only production writes sidecars so editing a config locally leaves no clutter behind
+    if os.getenv('ENV') == 'production':
+        try:
+            encoded = _json_dumps(data)
+            # JSON can't hold every YAML value (non-string keys, timestamps); skip the sidecar rather than load a different config
+            if _json_loads(encoded) != data:
+                return data
+            directory = os.path.dirname(os.path.abspath(path))
+            with tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.tmp', delete=False) as tmp:
+                tmp.write(encoded)
+            # The sidecar holds the same secrets, so it is never readable by more users than the source or 0o600 allows
+            os.chmod(tmp.name, stat.S_IMODE(os.stat(path).st_mode) & 0o600)
+            os.replace(tmp.name, cache_path)
+            for stale in Path(directory).glob(f"{Path(path).name}.*.json"):
+                if str(stale) != os.path.abspath(cache_path):
+                    stale.unlink(missing_ok=True)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write config cache {cache_path}: {e}")
+    return data
+
+def _normalize_trigger_words(words: Iterable[str]) -> FrozenSet[str]:
+    """Lowercase and de-duplicate trigger words, dropping blanks."""
+    return frozenset(w.strip().lower() for w in words if w.strip())
+
+class ConfigError(Exception):
+    """Custom exception for configuration errors."""
+    pass
+
+def _require_prefix(prefixes: Union[str, tuple], message: str):
+    """Build a plain validator that rejects strings not starting with one of the prefixes."""
+    def check(v: str) -> str:
+        if not v.startswith(prefixes):
+            raise ValueError(message)
+        return v
+    return AfterValidator(check)
+
+MongoURI = Annotated[str, _require_prefix(('mongodb://', 'mongodb+srv://'), "Database URI must start with 'mongodb://' or 'mongodb+srv://'")]
+TwitchOAuthToken = Annotated[str, _require_prefix('oauth:', "Twitch OAuth token must start with 'oauth:'")]
+WebSocketURI = Annotated[str, _require_prefix('ws://', "WebSocket URI must start with 'ws://'")]
+
+# Config models are loaded once and never mutated; building their schema waits for first use
+_MODEL_CONFIG = ConfigDict(defer_build=True, frozen=True)
+
+class DatabaseConfig(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    URI: MongoURI
+    DB_NAME: str
+    COLLECTION_PREFIX: str = "bot_"
+    MAX_POOL_SIZE: int = 10
+    TIMEOUT_MS: int = 5000
+
+class TwitchConfig(BaseModel):
+     model_config = _MODEL_CONFIG
+
+     OAUTH_TOKEN: TwitchOAuthToken
+     CHANNEL: str
+     BOT_NAME: str
+     BROADCASTER_ID: str
+     PREFIX: str = "!"
+     RATE_LIMIT: int = 20
+     MESSAGE_LIMIT: int = 500
+     IGNORE_LIST: List[str] = Field(default_factory=list)
+
+class OpenAIConfig(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    API_KEY: str
+    MODEL: str = "gpt-4o-mini" # Changed to gpt-4o-mini
+    MAX_TOKENS: int = 150
+    TEMPERATURE: float = 0.7
+
+class VoiceConfig(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    ENABLED: bool = True
+    PREFIX: str = "Hey Overlord"
+    COMMAND_TIMEOUT: float = 5.0
+    PHRASE_LIMIT: float = 10.0
+    LANGUAGE: str = "en-US"
+    CONFIDENCE_THRESHOLD: float = 0.7
+
+    @field_validator('COMMAND_TIMEOUT')
+    @classmethod
+    def validate_command_timeout(cls, v):
+        if v <= 0:
+            raise ValueError("Command timeout must be a positive number.")
+        return v
+
+    @field_validator('PHRASE_LIMIT')
+    @classmethod
+    def validate_phrase_limit(cls, v):
+        if v <= 0:
+            raise ValueError("Phrase limit must be a positive number.")
+        return v
+
+class StreamerBotConfig(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    WS_URI: WebSocketURI
+    RECONNECT_ATTEMPTS: int = 5
+    HEARTBEAT_INTERVAL: int = 20
+
+    @field_validator('RECONNECT_ATTEMPTS')
+    @classmethod
+    def validate_reconnect_attempts(cls, v):
+        if v <= 0:
+            raise ValueError("Reconnect attempts must be a positive number.")
+        return v
+
+    @field_validator('HEARTBEAT_INTERVAL')
+    @classmethod
+    def validate_heartbeat_interval(cls, v):
+        if v <= 0:
+            raise ValueError("Heartbeat interval must be a positive number.")
+        return v
+
+class LittleNavMapConfig(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    BASE_URL: str = "http://localhost:8965"
+    UPDATE_INTERVAL: float = 1.0
+    CACHE_TTL: int = 30
+
+    @field_validator('UPDATE_INTERVAL')
+    @classmethod
+    def validate_update_interval(cls, v):
+        if v <= 0:
+            raise ValueError("Update interval must be a positive number.")
+        return v
+
+    @field_validator('CACHE_TTL')
+    @classmethod
+    def validate_cache_ttl(cls, v):
+        if v <= 0:
+            raise ValueError("Cache TTL must be a positive number.")
+        return v
+
+class AviationWeatherConfig(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    BASE_URL: str = "https://api.checkwx.com/metar"
+    TIMEOUT_MS: int = 5000
+
+
+# Sub-config sections, validated into their model the first time they are read
+_SUBCONFIG_MODELS: Dict[str, type] = {
+    'twitch': TwitchConfig,
+    'database': DatabaseConfig,
+    'openai': OpenAIConfig,
+    'voice': VoiceConfig,
+    'streamerbot': StreamerBotConfig,
+    'littlenavmap': LittleNavMapConfig,
+    'aviationweather': AviationWeatherConfig,
+}
+
+@dataclass(slots=True, kw_only=True)
+class Config:
+    # Either pass built models, or leave them None and supply their raw dicts in _raw
+    twitch: Optional[TwitchConfig] = None
+    database: Optional[DatabaseConfig] = None
+    openai: Optional[OpenAIConfig] = None
+    voice: Optional[VoiceConfig] = None
+    streamerbot: Optional[StreamerBotConfig] = None
+    littlenavmap: Optional[LittleNavMapConfig] = None
+    aviationweather: Optional[AviationWeatherConfig] = None
+    _raw: Dict[str, dict] = field(default_factory=dict)
+    bot_trigger_words: FrozenSet[str] = frozenset({"bot", "assistant"})
+    bot_personality: str = "You are an AI Overlord managing a flight simulation Twitch channel."
+    verbose: bool = False
+    environment: str = field(default_factory=lambda: os.getenv('ENV', 'development'))
+    command_cooldowns: Dict[str, int] = field(default_factory=dict)
+    custom_commands_enabled: bool = True
+    log_level: str = "INFO"
+    sentry_dsn: Optional[str] = None
+    checkwx_api_key: Optional[str] = None
+    openweathermap_api_key: Optional[str] = None
+    command_permissions: Dict[str, Dict[str, Union[bool, List[str]]]] = field(default_factory=dict)
+    _file_path: Optional[str] = None
+    # (st_mtime_ns, st_size) of _file_path when it was loaded; lets reload() skip unchanged files
+    _file_digest: Optional[Tuple[int, int]] = None
+    logger: logging.Logger = field(default_factory=lambda: logging.getLogger(__name__))
+    # Derived from environment in setup_derived_values; declared so they get slots
+    is_production: bool = field(init=False, default=False)
+    is_development: bool = field(init=False, default=False)
+    is_testing: bool = field(init=False, default=False)
+
+    def __post_init__(self):
+        # Unset sections become empty slots so __getattr__ builds them on first access
+        for name in _SUBCONFIG_MODELS:
+            if getattr(self, name) is None:
+                delattr(self, name)
+        # Loaders hand over lists; normalise once so callers can rely on lowercase set lookups
+        self.bot_trigger_words = _normalize_trigger_words(self.bot_trigger_words)
+        self.validate()
+        self.setup_derived_values()
+        self.load_command_permissions()
+        if self._file_path:
+            self.logger.info(f"Configuration loaded from file: {self._file_path}")
+
+    def __getattr__(self, name: str):
+        """Build a sub-config from its raw section the first time it is read."""
+        model = _SUBCONFIG_MODELS.get(name)
+        if model is None:
+            raise AttributeError(f"{type(self).__name__!s} has no attribute {name!r}")
+        try:
+            value = model(**self._raw.get(name, {}))
+        except ValidationError as e:
+            raise ConfigError(f"Invalid {name} configuration: {e}") from e
+        setattr(self, name, value)
+        return value
+
+    def validate(self):
+        """Validate configuration values."""
+        if self.environment not in ['development', 'production', 'testing']:
+            raise ConfigError("Invalid environment specified")
+
+    def setup_derived_values(self):
+        """Set up any derived configuration values."""
+        self.is_production = self.environment == 'production'
+        self.is_development = self.environment == 'development'
+        self.is_testing = self.environment == 'testing'
+
+    @classmethod
+    def load_from_env(cls) -> 'Config':
+        """Load configuration from environment variables."""
+        _ensure_dotenv()
+        # One snapshot instead of a getenv() call per setting
+        env = dict(os.environ)
+
+        try:
+            raw = {
+                'twitch': dict(
+                    OAUTH_TOKEN=env.get('TWITCH_OAUTH_TOKEN'),
+                    CHANNEL=env.get('TWITCH_CHANNEL'),
+                    BOT_NAME=env.get('BOT_NAME'),
+                    BROADCASTER_ID=env.get('BROADCASTER_ID'),
+                    PREFIX=env.get('BOT_PREFIX', '!')
+                ),
+                'database': dict(
+                    URI=env.get('MONGO_URI'),
+                    DB_NAME=env.get('MONGO_DB_NAME')
+                ),
+                'openai': dict(
+                    API_KEY=env.get('CHATGPT_API_KEY'),
+                    MODEL=env.get('OPENAI_MODEL', 'gpt-4o-mini') # Changed to gpt-4o-mini
+                ),
+                'voice': dict(
+                    ENABLED=env.get('VOICE_ENABLED', 'True').lower() == 'true',
+                    PREFIX=env.get('VOICE_PREFIX', 'Hey Overlord'),
+                    COMMAND_TIMEOUT=float(env.get('VOICE_COMMAND_TIMEOUT', '5')),
+                    PHRASE_LIMIT=float(env.get('VOICE_COMMAND_PHRASE_LIMIT', '10')),
+                    LANGUAGE=env.get('VOICE_COMMAND_LANGUAGE', 'en-US')
+                ),
+                'streamerbot': dict(
+                    WS_URI=env.get('STREAMERBOT_WS_URI')
+                ),
+                'littlenavmap': dict(
+                    BASE_URL=env.get('LITTLENAVMAP_URL', 'http://localhost:8965')
+                ),
+                'aviationweather': {}
+            }
+            
+            openweathermap_api_key = env.get('OPENWEATHERMAP_API_KEY')
+            checkwx_api_key = env.get('CHECKWX_API_KEY')
+            
+            config_file = env.get('CONFIG_FILE')
+
+            return cls(
+                _raw=raw,
+                bot_trigger_words=env.get('BOT_TRIGGER_WORDS', 'bot,assistant').split(','),
+                bot_personality=env.get('BOT_PERSONALITY', 'You are an AI Overlord managing a flight simulation Twitch channel.'),
+                verbose=env.get('VERBOSE', 'False').lower() == 'true',
+                sentry_dsn=env.get('SENTRY_DSN'),
+                checkwx_api_key=checkwx_api_key,
+                openweathermap_api_key = openweathermap_api_key,
+                _file_path = config_file,
+                command_permissions = {},
+                logger = logging.getLogger(__name__)
+            )
+
+        except Exception as e:
+            logger.error("Config load from environment failed: %s", e, exc_info=True)
+            raise ConfigError(f"Configuration loading failed: {e}") from e
+
+    @classmethod
+    def load_from_file(cls, file_path: str) -> 'Config':
+        """Load configuration from a YAML file."""
+        try:
+            file_digest = _file_digest(file_path)
+            config_data = _load_yaml_cached(file_path)
+            
+            openweathermap_api_key = config_data.get('openweathermap_api_key')
+            checkwx_api_key = config_data.get('checkwx_api_key')
+
+            return cls(
+                _raw={name: config_data.get(name) or {} for name in _SUBCONFIG_MODELS},
+                bot_trigger_words=config_data.get('bot_trigger_words', ["bot", "assistant"]),
+                bot_personality=config_data.get('bot_personality', 'You are an AI Overlord managing a flight simulation Twitch channel.'),
+                verbose=config_data.get('verbose', False),
+                sentry_dsn=os.getenv('SENTRY_DSN'),
+                checkwx_api_key = checkwx_api_key,
+                openweathermap_api_key = openweathermap_api_key,
+                command_permissions = config_data.get('command_permissions', {}),
+                _file_path = file_path,
+                _file_digest = file_digest,
+                logger = logging.getLogger(__name__)
+            )
+        except Exception as e:
+            logger.error("Config load from %s failed: %s", file_path, e, exc_info=True)
+            raise ConfigError(f"Configuration file loading failed: {e}") from e
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Forget the Config memoized by load_config()."""
+        global _CONFIG_CACHE
+        _CONFIG_CACHE = None
+
+    @classmethod
+    async def load_from_file_async(cls, file_path: str) -> 'Config':
+        """Load configuration from a YAML file on a worker thread."""
+        return await asyncio.to_thread(cls.load_from_file, file_path)
+
+    @classmethod
+    def _reset_dotenv(cls):
+        """Make the next load_from_env() parse .env again."""
+        global _DOTENV_LOADED
+        _DOTENV_LOADED = False
+
+    def build_sections(self) -> 'Config':
+        """Build every sub-config now, so an invalid section raises ConfigError here instead of on first use."""
+        for name in _SUBCONFIG_MODELS:
+            getattr(self, name)
+        return self
+
+    def _replace_with(self, new_config: 'Config'):
+        """Copy every field of a freshly loaded config onto this instance."""
+        # Collect first: building a section can raise, and a failed reload must leave this config untouched
+        values = {f.name: getattr(new_config, f.name) for f in fields(self)}
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def _is_unchanged(self) -> bool:
+        """Whether _file_path still matches the digest recorded at load time."""
+        try:
+            return self._file_digest is not None and _file_digest(self._file_path) == self._file_digest
+        except OSError:
+            return False
+
+    def reload(self):
+        """Reload configuration from file."""
+        if self._file_path:
+            if self._is_unchanged():
+                self.logger.debug("Config unchanged, skipping reload")
+                return
+            self._replace_with(Config.load_from_file(self._file_path))
+            self.logger.info(f"Configuration reloaded from: {self._file_path}")
+        else:
+            self.logger.warning("No config file path available to reload from.")
+
+    async def reload_async(self):
+        """Reload configuration from file without blocking the event loop."""
+        if self._file_path:
+            if self._is_unchanged():
+                self.logger.debug("Config unchanged, skipping reload")
+                return
+            self._replace_with(await Config.load_from_file_async(self._file_path))
+            self.logger.info(f"Configuration reloaded from: {self._file_path}")
+        else:
+            self.logger.warning("No config file path available to reload from.")
+
+    def load_command_permissions(self):
+        """Load command permissions from the configuration."""
+        if self.command_permissions:
+            self.logger.info("Loading command permissions from configuration...")
+            for command_name, permissions in self.command_permissions.items():
+                 self.command_cooldowns[command_name] = permissions.get("cooldown", 0)
+
+def load_config() -> Config:
+    """Load configuration from environment or file."""
+    global _CONFIG_CACHE
+    config_file = os.getenv('CONFIG_FILE')
+    try:
+        mtime_ns = os.stat(config_file).st_mtime_ns if config_file else None
+    except OSError:
+        mtime_ns = None
+
+    # Reuse the previous result until CONFIG_FILE or its mtime changes
+    cache_key = (config_file, mtime_ns)
+    if _CONFIG_CACHE is not None and _CONFIG_CACHE[0] == cache_key:
+        return _CONFIG_CACHE[1]
+
+    try:
+        if config_file:
+            if mtime_ns is not None:
+                config = Config.load_from_file(config_file)
+            else:
+                logger.warning(f"Config file not found at {config_file}, falling back to environment variables.")
+                config = Config.load_from_env()
+        else:
+            config = Config.load_from_env()
+        # Fail at startup, not on the first chat message that reads a bad section
+        config.build_sections()
+    except ConfigError as e:
+        logger.error(f"Failed to load configuration: {e}")
+        raise
+
+    _CONFIG_CACHE = (cache_key, config)
+    return config
\ No newline at end of file
@@ -0,0 +1,218 @@
+# File: conftest.py
+import copy
+from collections import deque
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from bot import Bot
+from config import Config, TwitchConfig, DatabaseConfig, OpenAIConfig, VoiceConfig, StreamerBotConfig, LittleNavMapConfig
+from database_manager import DatabaseManager, CollectionNames
+from tts_manager import TTSManager, TTSStatus
+from chat_manager import ChatManager
+from command_handler import CommandHandler
+from littlenavmap_integration import LittleNavmapIntegration
+from personality import PersonalityManager, PersonalityProfile, LoyaltyLevel
+from aviation_weather_integration import AviationWeatherIntegration
+
+# Test-name prefix -> component marker, so e.g. `pytest -m chat_manager` runs one slice
+_COMPONENT_MARKERS = (
+    ("test_bot_", "bot_core"),
+    ("test_chat_manager_", "chat_manager"),
+    ("test_command_handler_", "command_handler"),
+    ("test_database_manager_", "database"),
+    ("test_littlenavmap_integration_", "littlenavmap"),
+    ("test_personality_manager_", "personality"),
+)
+
+# Tests that drive a background loop end to end rather than a single method
+_INTEGRATION_TESTS = {
+    "test_bot_periodic_flight_info_update",
+    "test_bot_periodic_location_facts",
+    "test_chat_manager_process_message_queue",
+    "test_chat_manager_update_metrics",
+    "test_database_manager_periodic_backup",
+    "test_database_manager_periodic_metrics_update",
+}
+
+# Tests that talk to a real MongoDB instead of the mocked collections
+_MONGODB_TESTS = {
+    "test_database_manager_connect",
+}
+
+def pytest_collection_modifyitems(items):
+    """Tag every test with its component, with unit or integration, and with mongodb if it needs a server."""
+    for item in items:
+        name = item.originalname
+        for prefix, marker in _COMPONENT_MARKERS:
+            if name.startswith(prefix):
+                item.add_marker(marker)
+                break
+        item.add_marker(pytest.mark.integration if name in _INTEGRATION_TESTS else pytest.mark.unit)
+        if name in _MONGODB_TESTS:
+            item.add_marker(pytest.mark.mongodb)
+
+# spec= introspects the whole class, so each spec'd mock is built once and cloned per test.
+# MagicMock(spec=...) still makes the class's coroutine methods AsyncMocks; plain attributes stay MagicMocks.
+_DB_MANAGER_TEMPLATE = MagicMock(spec=DatabaseManager)
+_TTS_MANAGER_TEMPLATE = MagicMock(spec=TTSManager)
+_LITTLENAVMAP_TEMPLATE = MagicMock(spec=LittleNavmapIntegration)
+_PERSONALITY_MANAGER_TEMPLATE = MagicMock(spec=PersonalityManager)
+_AVIATION_WEATHER_TEMPLATE = MagicMock(spec=AviationWeatherIntegration)
+
+# Frozen value objects, safe to share between tests
+_PROFILE = PersonalityProfile()
+_LOYALTY_LEVELS = (
+    LoyaltyLevel(
+        name="Initiate Drone",
+        min_points=0,
+        perks=("Basic interaction",),
+        title="Drone"
+    ),
+)
+
+def _openai_response(content):
+    """Plain-object stand-in for a chat completion; only choices[0].message.content is read."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+_OPENAI_RESPONSE = _openai_response("Mock response")
+
+def _clone_mock(template):
+    """Return an independent copy of a spec'd mock without redoing the spec introspection."""
+    mock = copy.copy(template)
+    # A shallow copy would share child mocks (and their calls) with the template
+    mock.__dict__['_mock_children'] = {}
+    mock.reset_mock()
+    return mock
+
+# Mock Config (read-only in every test, so it is built once per session)
+@pytest.fixture(scope="session")
+def mock_config():
+    return Config(
+        twitch=TwitchConfig(
+            OAUTH_TOKEN="oauth:mock_token",
+            CHANNEL="mock_channel",
+            BOT_NAME="mock_bot",
+            BROADCASTER_ID="12345",
+            PREFIX="!"
+        ),
+        database=DatabaseConfig(
+            URI="mongodb://localhost:27017/",
+            DB_NAME="mock_db"
+        ),
+        openai=OpenAIConfig(
+            API_KEY="mock_api_key"
+        ),
+        voice=VoiceConfig(),
+        streamerbot=StreamerBotConfig(
+            WS_URI="ws://localhost:7580"
+        ),
+        littlenavmap=LittleNavMapConfig(),
+        bot_trigger_words=["bot", "assistant"],
+        bot_personality="Mock AI Overlord",
+        verbose=True
+    )
+
+# Mock DatabaseManager
+@pytest.fixture
+def mock_db_manager():
+    mock = _clone_mock(_DB_MANAGER_TEMPLATE)
+    mock.collections = {
+        CollectionNames.CONVERSATIONS: AsyncMock(),
+        CollectionNames.USERS: AsyncMock(),
+        CollectionNames.COMMANDS: AsyncMock(),
+        CollectionNames.METRICS: AsyncMock(),
+        CollectionNames.BACKUPS: AsyncMock(),
+        CollectionNames.FLIGHT_DATA: AsyncMock(),
+        CollectionNames.ALERTS: AsyncMock()
+    }
+    return mock
+
+# Mock TTSManager
+@pytest.fixture
+def mock_tts_manager():
+    mock = _clone_mock(_TTS_MANAGER_TEMPLATE)
+    mock.status = TTSStatus.CONNECTED
+    mock.available_voices = {"default": MagicMock()}
+    mock.message_queue = AsyncMock()
+    mock.message_history = deque(maxlen=100)
+    return mock
+
+# Mock LittleNavmapIntegration
+@pytest.fixture
+def mock_littlenavmap():
+    mock = _clone_mock(_LITTLENAVMAP_TEMPLATE)
+    return mock
+
+# LittleNavmap mock reporting an active sim; the spec already made get_sim_info an AsyncMock
+@pytest.fixture
+def sim_info(mock_littlenavmap):
+    mock_littlenavmap.get_sim_info.return_value = {"active": True}
+    return mock_littlenavmap
+
+# Mock PersonalityManager
+@pytest.fixture
+def mock_personality_manager():
+    mock = _clone_mock(_PERSONALITY_MANAGER_TEMPLATE)
+    mock.personality = _PROFILE
+    mock.loyalty_levels = _LOYALTY_LEVELS
+    mock.user_loyalty = {}
+    mock.active_decrees = []
+    mock.last_interaction = {}
+    return mock
+
+# Mock OpenAI Client
+@pytest.fixture
+def mock_openai_client():
+    mock = AsyncMock()
+    mock.chat.completions.create = AsyncMock(return_value=_OPENAI_RESPONSE)
+    return mock
+
+# Mock AviationWeatherIntegration
+@pytest.fixture
+def mock_aviation_weather():
+    return _clone_mock(_AVIATION_WEATHER_TEMPLATE)
+
+# Bot constructor arguments wired to the mocks above; tests that need a variant can override one key
+@pytest.fixture
+def bot_kwargs(mock_config, mock_db_manager, mock_tts_manager, mock_littlenavmap, mock_personality_manager,
+               mock_openai_client, mock_aviation_weather):
+    return dict(
+        openai_client=mock_openai_client,
+        config=mock_config,
+        db_manager=mock_db_manager,
+        tts_manager=mock_tts_manager,
+        littlenavmap=mock_littlenavmap,
+        personality=mock_personality_manager,
+        aviation_weather=mock_aviation_weather
+    )
+
+# Tests that need a mock directly request it alongside the bot
+@pytest.fixture
+def bot(bot_kwargs):
+    return Bot(**bot_kwargs)
+
+@pytest.fixture
+def chat_manager(bot, mock_config):
+    return ChatManager(bot, mock_config)
+
+# Fresh per test since tests mutate custom_commands/command_aliases; the bot comes from the fixture above
+@pytest.fixture
+def command_handler(bot):
+    return CommandHandler(bot)
+
+def fake_msg(content="", name="test_user", is_mod=False, is_subscriber=False, echo=False):
+    """Plain-object chat message carrying only the attributes ChatManager and CommandHandler read."""
+    return SimpleNamespace(
+        content=content,
+        author=SimpleNamespace(name=name, is_mod=is_mod, is_subscriber=is_subscriber,
+                               is_broadcaster=False, is_vip=False),
+        channel=SimpleNamespace(name="mock_channel", send=AsyncMock()),
+        echo=echo
+    )
+
+# Twitch message for the CommandHandler tests; a plain stub is far cheaper to build than an AsyncMock
+@pytest.fixture
+def mock_message():
+    return fake_msg(content="!test command")
@@ -1,334 +1,465 @@
-# File: database_manager.py
-import logging
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
-from pymongo.errors import PyMongoError, ConnectionFailure, OperationFailure
-from pymongo import ASCENDING, DESCENDING, IndexModel
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
-from dataclasses import dataclass
-import asyncio
-from src.config import Config
-import backoff
-
-@dataclass
-class DatabaseMetrics:
-    total_conversations: int = 0
-    active_users: int = 0
-    average_response_time: float = 0.0
-    storage_size: int = 0
-    last_backup_time: Optional[datetime] = None
-    total_users: int = 0
-    total_flight_records: int = 0
-
-class CollectionNames:
-    CONVERSATIONS = "conversations"
-    USERS = "users"
-    COMMANDS = "commands"
-    METRICS = "metrics"
-    BACKUPS = "backups"
-    FLIGHT_DATA = "flight_data"
-    ALERTS = "alerts"
-
-class DatabaseManager:
-    def __init__(self, config: Config):
-        self.config = config
-        self.logger = logging.getLogger('DatabaseManager')
-        self.client: Optional[AsyncIOMotorClient] = None
-        self.db: Optional[AsyncIOMotorDatabase] = None
-        self.collections: Dict[str, AsyncIOMotorCollection] = {}
-        self.metrics = DatabaseMetrics()
-        self._connection_retries = 0
-        self._max_retries = 5
-        self._retry_delay = 5
-        self._connected = asyncio.Event()
-        self._backup_task: Optional[asyncio.Task] = None
-        self._metrics_task: Optional[asyncio.Task] = None
-
-    @backoff.on_exception(backoff.expo, ConnectionFailure, max_tries=5)
-    async def connect(self) -> None:
-        """Connect to MongoDB with exponential backoff."""
-        try:
-            self.client = AsyncIOMotorClient(
-                self.config.database.URI,
-                maxPoolSize=self.config.database.MAX_POOL_SIZE,
-                serverSelectionTimeoutMS=self.config.database.TIMEOUT_MS
-            )
-            
-            # Test the connection
-            await self.client.admin.command('ping')
-            
-            self.db = self.client[self.config.database.DB_NAME]
-            await self._initialize_collections()
-            await self.ensure_indexes()
-            
-            self._connected.set()
-            self.logger.info("Successfully connected to MongoDB")
-            
-            # Start background tasks
-            self._backup_task = asyncio.create_task(self._periodic_backup())
-            self._metrics_task = asyncio.create_task(self._periodic_metrics_update())
-            
-            return
-                
-        except Exception as e:
-            self.status = "error"
-            self._connected.clear()
-            self.logger.error(f"Failed to connect to MongoDB: {e}", exc_info=True)
-            raise
-
-    async def _initialize_collections(self) -> None:
-        """Initialize all required collections."""
-        self.collections = {
-            CollectionNames.CONVERSATIONS: self.db[CollectionNames.CONVERSATIONS],
-            CollectionNames.USERS: self.db[CollectionNames.USERS],
-            CollectionNames.COMMANDS: self.db[CollectionNames.COMMANDS],
-            CollectionNames.METRICS: self.db[CollectionNames.METRICS],
-            CollectionNames.BACKUPS: self.db[CollectionNames.BACKUPS],
-            CollectionNames.FLIGHT_DATA: self.db[CollectionNames.FLIGHT_DATA],
-            CollectionNames.ALERTS: self.db[CollectionNames.ALERTS]
-        }
-
-    async def ensure_indexes(self) -> None:
-        """Create and maintain database indexes."""
-        try:
-            indexes = {
-                CollectionNames.CONVERSATIONS: [
-                    IndexModel([("timestamp", DESCENDING)]),
-                    IndexModel([("user", ASCENDING), ("timestamp", DESCENDING)])
-                ],
-                CollectionNames.USERS: [
-                    IndexModel([("username", ASCENDING)], unique=True),
-                    IndexModel([("last_seen", DESCENDING)])
-                ],
-                CollectionNames.COMMANDS: [
-                    IndexModel([("name", ASCENDING)], unique=True),
-                    IndexModel([("usage_count", DESCENDING)])
-                ],
-                CollectionNames.FLIGHT_DATA: [
-                    IndexModel([("timestamp", DESCENDING)]),
-                    IndexModel([("flight_id", ASCENDING)])
-                ],
-                CollectionNames.ALERTS: [
-                    IndexModel([("name", ASCENDING)], unique=True),
-                    IndexModel([("created_at", DESCENDING)])
-                ]
-            }
-            
-            for collection_name, collection_indexes in indexes.items():
-                await self.collections[collection_name].create_indexes(collection_indexes)
-            
-            self.logger.info("Database indexes created successfully")
-        except OperationFailure as e:
-            self.logger.error(f"Failed to create indexes: {e}", exc_info=True)
-            raise
-
-    async def save_conversation(self, user_message: str, bot_response: str, 
-                              metadata: Optional[Dict[str, Any]] = None) -> str:
-        """Save a conversation with additional metadata."""
-        await self._connected.wait()
-        
-        try:
-            document = {
-                'user': user_message,
-                'bot': bot_response,
-                'timestamp': datetime.utcnow(),
-                'metadata': metadata or {},
-                'response_time': metadata.get('response_time') if metadata else None
-            }
-            
-            result = await self.collections[CollectionNames.CONVERSATIONS].insert_one(document)
-            return str(result.inserted_id)
-            
-        except PyMongoError as e:
-            self.logger.error(f"Failed to save conversation: {e}")
-            raise
-
-    async def get_conversation_history(self, 
-                                     user: Optional[str] = None,
-                                     limit: int = 5,
-                                     skip: int = 0,
-                                     start_date: Optional[datetime] = None,
-                                     end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
-        """Get conversation history with advanced filtering."""
-        await self._connected.wait()
-        
-        query = {}
-        if user:
-            query['user'] = user
-        if start_date or end_date:
-            query['timestamp'] = {}
-            if start_date:
-                query['timestamp']['$gte'] = start_date
-            if end_date:
-                query['timestamp']['$lte'] = end_date
-
-        try:
-            cursor = self.collections[CollectionNames.CONVERSATIONS].find(query)
-            cursor.sort('timestamp', DESCENDING).skip(skip).limit(limit)
-            return await cursor.to_list(length=limit)
-        except PyMongoError as e:
-            self.logger.error(f"Failed to retrieve conversation history: {e}")
-            raise
-
-    async def save_flight_data(self, flight_data: Dict[str, Any]) -> str:
-        """Save flight simulation data."""
-        await self._connected.wait()
-        
-        try:
-            document = {
-                **flight_data,
-                'timestamp': datetime.utcnow()
-            }
-            result = await self.collections[CollectionNames.FLIGHT_DATA].insert_one(document)
-            return str(result.inserted_id)
-        except PyMongoError as e:
-            self.logger.error(f"Failed to save flight data: {e}")
-            raise
-
-    async def save_alert(self, name: str, message: str) -> None:
-        """Save a custom alert."""
-        await self._connected.wait()
-        
-        try:
-            document = {
-                'name': name,
-                'message': message,
-                'created_at': datetime.utcnow()
-            }
-            await self.collections[CollectionNames.ALERTS].update_one(
-                {'name': name},
-                {'$set': document},
-                upsert=True
-            )
-        except PyMongoError as e:
-            self.logger.error(f"Failed to save alert: {e}")
-            raise
-
-    async def get_alert(self, name: str) -> Optional[Dict[str, Any]]:
-        """Retrieve an alert by name."""
-        await self._connected.wait()
-        
-        try:
-            return await self.collections[CollectionNames.ALERTS].find_one({'name': name})
-        except PyMongoError as e:
-            self.logger.error(f"Failed to retrieve alert: {e}")
-            raise
-
-    async def delete_alert(self, name: str) -> bool:
-        """Delete an alert."""
-        await self._connected.wait()
-        
-        try:
-            result = await self.collections[CollectionNames.ALERTS].delete_one({'name': name})
-            return result.deleted_count > 0
-        except PyMongoError as e:
-            self.logger.error(f"Failed to delete alert: {e}")
-            raise
-
-    async def _periodic_backup(self) -> None:
-        """Perform periodic database backups."""
-        while True:
-            try:
-                await asyncio.sleep(3600)  # Backup every hour
-                await self._create_backup()
-            except asyncio.CancelledError:
-                 break
-            except Exception as e:
-                self.logger.error(f"Backup failed: {e}")
-                await asyncio.sleep(60)
-
-    async def _create_backup(self) -> None:
-        """Create a database backup."""
-        try:
-            collections_data = {}
-            for name, collection in self.collections.items():
-                if name != CollectionNames.BACKUPS:  # Don't backup the backups
-                    data = await collection.find().to_list(length=None)
-                    collections_data[name] = data
-
-            backup_doc = {
-                'timestamp': datetime.utcnow(),
-                'data': collections_data,
-                'metadata': {
-                    'version': '1.0',
-                    'collections': list(collections_data.keys())
-                }
-            }
-
-            await self.collections[CollectionNames.BACKUPS].insert_one(backup_doc)
-            self.metrics.last_backup_time = datetime.utcnow()
-            self.logger.info("Database backup created successfully")
-            
-        except PyMongoError as e:
-            self.logger.error(f"Failed to create backup: {e}")
-            raise
-
-    async def _periodic_metrics_update(self) -> None:
-        """Update database metrics periodically."""
-        while True:
-            try:
-                await asyncio.sleep(300)  # Update every 5 minutes
-                await self._update_metrics()
-            except asyncio.CancelledError:
-                  break
-            except Exception as e:
-                self.logger.error(f"Metrics update failed: {e}")
-                await asyncio.sleep(60)
-
-    async def _update_metrics(self) -> None:
-        """Update database metrics."""
-        try:
-            self.metrics.total_conversations = await self.collections[
-                CollectionNames.CONVERSATIONS].count_documents({})
-            
-            self.metrics.active_users = len(await self.collections[
-                CollectionNames.CONVERSATIONS].distinct('user'))
-            
-            pipeline = [
-                {'$match': {'response_time': {'$exists': True}}},
-                {'$group': {'_id': None, 'avg_time': {'$avg': '$response_time'}}}
-            ]
-            result = await self.collections[CollectionNames.CONVERSATIONS].aggregate(
-                pipeline).to_list(length=1)
-            if result:
-                self.metrics.average_response_time = result[0]['avg_time']
-
-            stats = await self.db.command('dbStats')
-            self.metrics.storage_size = stats['storageSize']
-            
-            self.metrics.total_users = await self.collections[
-                CollectionNames.USERS].count_documents({})
-            
-            self.metrics.total_flight_records = await self.collections[
-                CollectionNames.FLIGHT_DATA].count_documents({})
-
-        except PyMongoError as e:
-            self.logger.error(f"Failed to update metrics: {e}")
-            raise
-
-    async def close(self) -> None:
-        """Close database connection and cleanup."""
-        if self._backup_task:
-            self._backup_task.cancel()
-        if self._metrics_task:
-            self._metrics_task.cancel()
-            
-        try:
-            if self._backup_task:
-                await self._backup_task
-            if self._metrics_task:
-                await self._metrics_task
-        except asyncio.CancelledError:
-            pass
-
-        if self.client:
-            self.client.close()
-            self._connected.clear()
-            self.logger.info("Database connection closed")
-
-    async def __aenter__(self):
-        await self.connect()
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
+# File: database_manager.py
+import logging
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError, PyMongoError, ConnectionFailure, OperationFailure
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+import asyncio
+from src.config import Config
+import backoff
+
+# Conversations saved within this window share one insert_many round trip
+_CONVERSATION_FLUSH_DELAY = 0.05
+
+@dataclass
+class DatabaseMetrics:
+    total_conversations: int = 0
+    active_users: int = 0
+    average_response_time: float = 0.0
+    storage_size: int = 0
+    last_backup_time: Optional[datetime] = None
+    total_users: int = 0
+    total_flight_records: int = 0
+
+class CollectionNames:
+    CONVERSATIONS = "conversations"
+    USERS = "users"
+    COMMANDS = "commands"
+    METRICS = "metrics"
+    BACKUPS = "backups"
+    FLIGHT_DATA = "flight_data"
+    ALERTS = "alerts"
+
+class DatabaseManager:
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = logging.getLogger('DatabaseManager')
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self.collections: Dict[str, AsyncIOMotorCollection] = {}
+        self.metrics = DatabaseMetrics()
+        self._connection_retries = 0
+        self._max_retries = 5
+        self._retry_delay = 5
+        # The flag is the fast path for every call; the event only parks callers that arrive before connect()
+        self._connected = False
+        self._connected_event = asyncio.Event()
+        self._backup_task: Optional[asyncio.Task] = None
+        self._metrics_task: Optional[asyncio.Task] = None
+        # Conversation stats are read from the database once, then kept current by save_conversation
+        self._conversation_stats_seeded = False
+        self._conversation_count = 0
+        # Only the number of distinct user messages; keeping the texts themselves would grow forever
+        self._conversation_user_count = 0
+        self._response_time_total = 0.0
+        self._response_time_count = 0
+        self._pending_conversations: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @backoff.on_exception(backoff.expo, ConnectionFailure, max_tries=5)
+    async def connect(self) -> None:
+        """Connect to MongoDB with exponential backoff."""
+        try:
+            self.client = AsyncIOMotorClient(
+                self.config.database.URI,
+                maxPoolSize=self.config.database.MAX_POOL_SIZE,
+                serverSelectionTimeoutMS=self.config.database.TIMEOUT_MS
+            )
+            
+            # Test the connection
+            await self.client.admin.command('ping')
+            
+            self.db = self.client[self.config.database.DB_NAME]
+            await self._initialize_collections()
+            await self.ensure_indexes()
+            
+            self._connected = True
+            self._connected_event.set()
+            self.logger.info("Successfully connected to MongoDB")
+            
+            # Start background tasks
+            self._backup_task = asyncio.create_task(self._periodic_backup())
+            self._metrics_task = asyncio.create_task(self._periodic_metrics_update())
+            
+            return
+                
+        except Exception as e:
+            self.status = "error"
+            self._connected = False
+            self._connected_event.clear()
+            self.logger.error(f"Failed to connect to MongoDB: {e}", exc_info=True)
+            raise
+
+    async def _initialize_collections(self) -> None:
+        """Initialize all required collections."""
+        self.collections = {
+            CollectionNames.CONVERSATIONS: self.db[CollectionNames.CONVERSATIONS],
+            CollectionNames.USERS: self.db[CollectionNames.USERS],
+            CollectionNames.COMMANDS: self.db[CollectionNames.COMMANDS],
+            CollectionNames.METRICS: self.db[CollectionNames.METRICS],
+            CollectionNames.BACKUPS: self.db[CollectionNames.BACKUPS],
+            CollectionNames.FLIGHT_DATA: self.db[CollectionNames.FLIGHT_DATA],
+            CollectionNames.ALERTS: self.db[CollectionNames.ALERTS]
+        }
+
+    async def ensure_indexes(self) -> None:
+        """Create and maintain database indexes."""
+        try:
+            indexes = {
+                CollectionNames.CONVERSATIONS: [
+                    IndexModel([("timestamp", DESCENDING)]),
+                    IndexModel([("user", ASCENDING), ("timestamp", DESCENDING)])
+                ],
+                CollectionNames.USERS: [
+                    IndexModel([("username", ASCENDING)], unique=True),
+                    IndexModel([("last_seen", DESCENDING)])
+                ],
+                CollectionNames.COMMANDS: [
+                    IndexModel([("name", ASCENDING)], unique=True),
+                    IndexModel([("usage_count", DESCENDING)])
+                ],
+                CollectionNames.FLIGHT_DATA: [
+                    IndexModel([("timestamp", DESCENDING)]),
+                    IndexModel([("flight_id", ASCENDING)])
+                ],
+                CollectionNames.ALERTS: [
+                    IndexModel([("name", ASCENDING)], unique=True),
+                    IndexModel([("created_at", DESCENDING)])
+                ]
+            }
+            
+            for collection_name, collection_indexes in indexes.items():
+                await self.collections[collection_name].create_indexes(collection_indexes)
+            
+            self.logger.info("Database indexes created successfully")
+        except OperationFailure as e:
+            self.logger.error(f"Failed to create indexes: {e}", exc_info=True)
+            raise
+
+    async def save_conversation(self, user_message: str, bot_response: str, 
+                              metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Save a conversation with additional metadata."""
+        if not self._connected:
+            await self._connected_event.wait()
+        
+        try:
+            document = {
+                'user': user_message,
+                'bot': bot_response,
+                'timestamp': datetime.utcnow(),
+                'metadata': metadata or {},
+                'response_time': metadata.get('response_time') if metadata else None
+            }
+            
+            inserted = asyncio.get_running_loop().create_future()
+            self._pending_conversations.append((document, inserted))
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_conversations())
+            return str(await inserted)
+            
+        except PyMongoError as e:
+            self.logger.error(f"Failed to save conversation: {e}")
+            raise
+
+    async def _flush_conversations(self) -> None:
+        """Write every conversation queued during the flush window with a single insert_many."""
+        await asyncio.sleep(_CONVERSATION_FLUSH_DELAY)
+        batch, self._pending_conversations = self._pending_conversations, []
+        self._flush_task = None
+
+        documents = [document for document, _ in batch]
+        conversations = self.collections[CollectionNames.CONVERSATIONS]
+        new_users = set()
+        if self._conversation_stats_seeded:
+            # Ask which of these messages are already stored, so active_users stays a distinct count
+            texts = {document['user'] for document in documents}
+            try:
+                new_users = texts.difference(await conversations.distinct('user', {'user': {'$in': list(texts)}}))
+            except PyMongoError as e:
+                self.logger.warning(f"Could not check conversation users: {e}")
+        try:
+            await conversations.insert_many(documents)
+            written = len(batch)
+            error = None
+        except Exception as e:
+            # Ordered inserts stop at the first failure; everything before it was written
+            written = e.details.get('nInserted', 0) if isinstance(e, BulkWriteError) else 0
+            error = e
+
+        # insert_many fills in each document's _id before sending it
+        for i, (document, inserted) in enumerate(batch):
+            if i < written:
+                self._record_conversation(document, new_users)
+                if not inserted.done():
+                    inserted.set_result(document['_id'])
+            elif not inserted.done():
+                inserted.set_exception(error)
+
+    def _conversation_cursor(self,
+                             user: Optional[str],
+                             limit: int,
+                             skip: int,
+                             start_date: Optional[datetime],
+                             end_date: Optional[datetime],
+                             fields: Optional[Tuple[str, ...]]):
+        """Build the newest-first conversation query shared by the history readers."""
+        query = {}
+        if user:
+            query['user'] = user
+        if start_date or end_date:
+            query['timestamp'] = {}
+            if start_date:
+                query['timestamp']['$gte'] = start_date
+            if end_date:
+                query['timestamp']['$lte'] = end_date
+
+        # Trimming to the requested fields server-side saves transferring and decoding the rest
+        projection = (dict.fromkeys(fields, 1) | {'_id': 0}) if fields else None
+        cursor = self.collections[CollectionNames.CONVERSATIONS].find(query, projection)
+        return cursor.sort('timestamp', DESCENDING).skip(skip).limit(limit)
+
+    def _record_conversation(self, document: Dict[str, Any], new_users: set) -> None:
+        """Fold a newly saved conversation into the running stats."""
+        if not self._conversation_stats_seeded:
+            return  # the seed query will count it
+        self._conversation_count += 1
+        if document['user'] in new_users:
+            new_users.discard(document['user'])
+            self._conversation_user_count += 1
+        response_time = document['response_time']
+        if isinstance(response_time, (int, float)):
+            self._response_time_total += response_time
+            self._response_time_count += 1
+
+    async def get_conversation_history(self, 
+                                     user: Optional[str] = None,
+                                     limit: int = 5,
+                                     skip: int = 0,
+                                     start_date: Optional[datetime] = None,
+                                     end_date: Optional[datetime] = None,
+                                     fields: Optional[Tuple[str, ...]] = None) -> List[Dict[str, Any]]:
+        """Get conversation history with advanced filtering."""
+        if not self._connected:
+            await self._connected_event.wait()
+
+        try:
+            cursor = self._conversation_cursor(user, limit, skip, start_date, end_date, fields)
+            return await cursor.to_list(length=limit)
+        except PyMongoError as e:
+            self.logger.error(f"Failed to retrieve conversation history: {e}")
+            raise
+
+    async def iter_conversation_history(self,
+                                        user: Optional[str] = None,
+                                        limit: int = 5,
+                                        skip: int = 0,
+                                        start_date: Optional[datetime] = None,
+                                        end_date: Optional[datetime] = None,
+                                        fields: Optional[Tuple[str, ...]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream conversation history one document at a time instead of building a list."""
+        if not self._connected:
+            await self._connected_event.wait()
+
+        try:
+            async for document in self._conversation_cursor(user, limit, skip, start_date, end_date, fields):
+                yield document
+        except PyMongoError as e:
+            self.logger.error(f"Failed to retrieve conversation history: {e}")
+            raise
+
+    async def save_flight_data(self, flight_data: Dict[str, Any]) -> str:
+        """Save flight simulation data."""
+        if not self._connected:
+            await self._connected_event.wait()
+        
+        try:
+            document = {
+                **flight_data,
+                'timestamp': datetime.utcnow()
+            }
+            result = await self.collections[CollectionNames.FLIGHT_DATA].insert_one(document)
+            return str(result.inserted_id)
+        except PyMongoError as e:
+            self.logger.error(f"Failed to save flight data: {e}")
+            raise
+
+    async def save_alert(self, name: str, message: str) -> None:
+        """Save a custom alert."""
+        if not self._connected:
+            await self._connected_event.wait()
+        
+        try:
+            document = {
+                'name': name,
+                'message': message,
+                'created_at': datetime.utcnow()
+            }
+            await self.collections[CollectionNames.ALERTS].update_one(
+                {'name': name},
+                {'$set': document},
+                upsert=True
+            )
+        except PyMongoError as e:
+            self.logger.error(f"Failed to save alert: {e}")
+            raise
+
+    async def get_alert(self, name: str) -> Optional[Dict[str, Any]]:
+        """Retrieve an alert by name."""
+        if not self._connected:
+            await self._connected_event.wait()
+        
+        try:
+            return await self.collections[CollectionNames.ALERTS].find_one({'name': name})
+        except PyMongoError as e:
+            self.logger.error(f"Failed to retrieve alert: {e}")
+            raise
+
+    async def delete_alert(self, name: str) -> bool:
+        """Delete an alert."""
+        if not self._connected:
+            await self._connected_event.wait()
+        
+        try:
+            result = await self.collections[CollectionNames.ALERTS].delete_one({'name': name})
+            return result.deleted_count > 0
+        except PyMongoError as e:
+            self.logger.error(f"Failed to delete alert: {e}")
+            raise
+
+    async def _periodic_backup(self) -> None:
+        """Perform periodic database backups."""
+        while True:
+            try:
+                await asyncio.sleep(3600)  # Backup every hour
+                await self._create_backup()
+            except asyncio.CancelledError:
+                 break
+            except Exception as e:
+                self.logger.error(f"Backup failed: {e}")
+                await asyncio.sleep(60)
+
+    async def _create_backup(self) -> None:
+        """Create a database backup."""
+        try:
+            # Don't backup the backups; the remaining scans are independent, so run them concurrently
+            names = [name for name in self.collections if name != CollectionNames.BACKUPS]
+            results = await asyncio.gather(*(
+                self.collections[name].find().to_list(length=None) for name in names
+            ))
+            collections_data = dict(zip(names, results))
+
+            backup_doc = {
+                'timestamp': datetime.utcnow(),
+                'data': collections_data,
+                'metadata': {
+                    'version': '1.0',
+                    'collections': list(collections_data.keys())
+                }
+            }
+
+            await self.collections[CollectionNames.BACKUPS].insert_one(backup_doc)
+            self.metrics.last_backup_time = datetime.utcnow()
+            self.logger.info("Database backup created successfully")
+            
+        except PyMongoError as e:
+            self.logger.error(f"Failed to create backup: {e}")
+            raise
+
+    async def _periodic_metrics_update(self) -> None:
+        """Update database metrics periodically."""
+        while True:
+            try:
+                await asyncio.sleep(300)  # Update every 5 minutes
+                await self._update_metrics()
+            except asyncio.CancelledError:
+                  break
+            except Exception as e:
+                self.logger.error(f"Metrics update failed: {e}")
+                await asyncio.sleep(60)
+
+    async def _update_metrics(self) -> None:
+        """Update database metrics."""
+        try:
+            if not self._conversation_stats_seeded:
+                await self._seed_conversation_stats()
+
+            self.metrics.total_conversations = self._conversation_count
+            self.metrics.active_users = self._conversation_user_count
+            if self._response_time_count:
+                self.metrics.average_response_time = self._response_time_total / self._response_time_count
+
+            stats = await self.db.command('dbStats')
+            self.metrics.storage_size = stats['storageSize']
+            
+            self.metrics.total_users = await self.collections[
+                CollectionNames.USERS].count_documents({})
+            
+            self.metrics.total_flight_records = await self.collections[
+                CollectionNames.FLIGHT_DATA].count_documents({})
+
+        except PyMongoError as e:
+            self.logger.error(f"Failed to update metrics: {e}")
+            raise
+
+    async def _seed_conversation_stats(self) -> None:
+        """Load the conversation totals that save_conversation keeps current from then on."""
+        conversations = self.collections[CollectionNames.CONVERSATIONS]
+        # Count saves incrementally from before the first query: one landing while the queries run
+        # may be counted twice, but none can slip between the seed and the running totals
+        self._conversation_stats_seeded = True
+        try:
+            count = await conversations.count_documents({})
+            users = len(await conversations.distinct('user'))
+
+            pipeline = [
+                {'$match': {'response_time': {'$type': 'number'}}},
+                {'$group': {'_id': None, 'total_time': {'$sum': '$response_time'}, 'timed': {'$sum': 1}}}
+            ]
+            result = await conversations.aggregate(pipeline).to_list(length=1)
+        except Exception:
+            # Start over on the next update rather than keep totals that miss the seed
+            self._conversation_stats_seeded = False
+            self._conversation_count = self._conversation_user_count = 0
+            self._response_time_total, self._response_time_count = 0.0, 0
+            raise
+
+        # Added, not assigned, so saves recorded while the queries ran are kept
+        self._conversation_count += count
+        self._conversation_user_count += users
+        if result:
+            self._response_time_total += result[0]['total_time']
+            self._response_time_count += result[0]['timed']
+
+    async def close(self) -> None:
+        """Close database connection and cleanup."""
+        if self._backup_task:
+            self._backup_task.cancel()
+        if self._metrics_task:
+            self._metrics_task.cancel()
+            
+        try:
+            if self._backup_task:
+                await self._backup_task
+            if self._metrics_task:
+                await self._metrics_task
+        except asyncio.CancelledError:
+            pass
+
+        # Let queued conversations reach the database before the client goes away
+        if self._flush_task:
+            await self._flush_task
+
+        if self.client:
+            self.client.close()
+            self._connected = False
+            self._connected_event.clear()
+            self.logger.info("Database connection closed")
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close()
\ No newline at end of file
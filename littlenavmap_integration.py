@@ -1,458 +1,609 @@
-# File: littlenavmap_integration.py
-# -*- coding: utf-8 -*-
-import asyncio
-import aiohttp
-import logging
-import sys
-from src.config import Config
-import backoff
-import aiohttp
-import json
-import re
-from typing import Tuple, Optional, Dict, Any
-from urllib.parse import quote
-
-class LittleNavmapIntegration:
-    def __init__(self, config):
-        self.config = config
-        self.base_url = self.config.littlenavmap.BASE_URL
-        self.api_base_url = f"{self.config.littlenavmap.BASE_URL}/api" # Corrected base URL
-        self.logger = logging.getLogger("LittleNavmapIntegration")
-        self.openweathermap_api_key = self.config.openweathermap_api_key
-        self.session = aiohttp.ClientSession()
-        
-        # Set up detailed logging
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        if not self.logger.handlers:
-            self.logger.addHandler(handler)
-        self.logger.setLevel(logging.INFO)
-        self.logger.debug("LittleNavmapIntegration initialized with base_url: %s", self.base_url)
-        self.session = aiohttp.ClientSession()
-
-    async def start(self):
-        """Initialize the integration."""
-        try:
-            sim_info = await self.get_sim_info()
-            if sim_info:
-                self.logger.info("Successfully connected to LittleNavMap")
-                self.logger.debug(f"Initial sim info: {sim_info}")
-            else:
-                self.logger.warning("Could not connect to LittleNavMap on startup")
-        except Exception as e:
-            self.logger.error(f"Error during startup: {e}", exc_info=True)
-
-    async def stop(self):
-        """Stop the integration and cleanup."""
-        if not self.session.closed:
-            await self.session.close()
-        self.logger.info("LittleNavMap integration stopped")
-
-    @backoff.on_exception(backoff.expo, aiohttp.ClientError, max_tries=3)
-    async def get_sim_info(self):
-        """Retrieve simulation information from LittleNavMap."""
-        endpoint = f"{self.base_url}/sim/info"
-        try:
-            async with self.session.get(endpoint) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    content = await response.text()
-                    self.logger.error(f"Failed to get sim info. Status: {response.status}, Content: {content}")
-                    return None
-        except aiohttp.ClientError as e:
-            self.logger.error(f"Connection error fetching sim info: {e}")
-            raise
-        except Exception as e:
-            self.logger.error(f"Error fetching simulation info: {e}", exc_info=True)
-            return None
-
-    @backoff.on_exception(backoff.expo, aiohttp.ClientError, max_tries=3)
-    async def get_airport_info(self, ident: str):
-        """Get information about a specific airport."""
-        return await self._get_data(f'/airport/info', params={"ident": ident.lower()})
-    
-    async def _get_data(self, endpoint: str, params: Optional[Dict] = None):
-        """Helper function to make a request to a specific API endpoint."""
-        self.logger.debug(f"Attempting to retrieve data from endpoint: {endpoint}")
-        url = f"{self.api_base_url}{endpoint[1:]}" # Removed leading slash from endpoint
-        self.logger.debug(f"Full URL: {url}")
-        
-        headers = {
-            'User-Agent': 'TwitchBot/1.0',
-            'Accept': 'application/json'
-        }
-        
-        try:
-            async with self.session.get(url, headers=headers, params=params) as response:
-                self.logger.debug(f"Response status: {response.status}")
-                self.logger.debug(f"Response headers: {response.headers}")
-                self.logger.debug(f"Request URL: {response.request_info.url}") # Log the full URL
-                if params:
-                    self.logger.debug(f"Request Parameters: {params}") # Log the parameters
-                content = await response.text()
-                self.logger.debug(f"Response content: {content}")
-                
-                if response.status == 200:
-                    data = await response.json()
-                    self.logger.info(f"Successfully retrieved data from {endpoint}")
-                    return data
-                elif response.status == 404:
-                    self.logger.error(f"Failed to retrieve data from {endpoint}. Status code: {response.status}. Content: {content}. Check Little Navmap web server and API path.")
-                    return None
-                elif response.status >= 500:
-                     self.logger.error(f"Server error when accessing {url}. Status code: {response.status}. Content: {content}")
-                     raise aiohttp.ClientError(f"Server error when accessing {url}. Status code: {response.status}")
-                else:
-                    self.logger.error(f"Failed to retrieve data from {endpoint}. Status code: {response.status}. Content: {content}")
-                    return None
-        except aiohttp.ClientError as e:
-            self.logger.error(f"Connection error while accessing {url}: {str(e)}")
-            raise
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred: {str(e)}", exc_info=True)
-            return None
-
-    async def get_current_flight_data(self):
-        """Get current flight data."""
-        sim_info = await self.get_sim_info()
-        if sim_info:
-            return {
-                'aircraft': {
-                    'altitude': sim_info.get('indicated_altitude', 0),
-                    'speed': self._convert_ms_to_kmh(sim_info.get('ground_speed', 0)),
-                    'heading': sim_info.get('heading', 0),
-                    'latitude': sim_info.get('position', {}).get('lat', 0),
-                    'longitude': sim_info.get('position', {}).get('lon', 0),
-                    'wind_direction': sim_info.get('wind_direction', 0),
-                    'wind_speed': self._convert_ms_to_kmh(sim_info.get('wind_speed', 0)),
-                    'on_ground': sim_info.get('on_ground', False)
-                }
-            }
-        return None
-
-    async def _get_data(self, endpoint: str, params: Optional[Dict] = None):
-        """Helper function to make a request to a specific API endpoint."""
-        self.logger.debug(f"Attempting to retrieve data from endpoint: {endpoint}")
-        url = f"{self.api_base_url}{endpoint[1:]}" # Removed leading slash from endpoint
-        self.logger.debug(f"Full URL: {url}")
-        
-        headers = {
-            'User-Agent': 'TwitchBot/1.0',
-            'Accept': 'application/json'
-        }
-        
-        try:
-            async with self.session.get(url, headers=headers, params=params) as response:
-                self.logger.debug(f"Response status: {response.status}")
-                self.logger.debug(f"Response headers: {response.headers}")
-                self.logger.debug(f"Request URL: {response.request_info.url}") # Log the full URL
-                content = await response.text()
-                self.logger.debug(f"Response content: {content}")
-                
-                if response.status == 200:
-                    data = await response.json()
-                    self.logger.info(f"Successfully retrieved data from {endpoint}")
-                    return data
-                elif response.status == 404:
-                    self.logger.error(f"Failed to retrieve data from {endpoint}. Status code: {response.status}. Content: {content}. Check Little Navmap web server and API path.")
-                    return None
-                elif response.status >= 500:
-                     self.logger.error(f"Server error when accessing {url}. Status code: {response.status}. Content: {content}")
-                     raise aiohttp.ClientError(f"Server error when accessing {url}. Status code: {response.status}")
-                else:
-                    self.logger.error(f"Failed to retrieve data from {endpoint}. Status code: {response.status}. Content: {content}")
-                    return None
-        except aiohttp.ClientError as e:
-            self.logger.error(f"Connection error while accessing {url}: {str(e)}")
-            raise
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred: {str(e)}", exc_info=True)
-            return None
-
-    async def _fetch_real_world_weather(self, latitude: float, longitude: float) -> Optional[dict]:
-        """Fetch real-world weather data using OpenWeatherMap API."""
-        api_key = self.config.openweathermap_api_key
-        if not api_key:
-            self.logger.warning("OpenWeatherMap API key not configured.")
-            return None
-        url = f"https://api.openweathermap.org/data/2.5/weather?lat={latitude}&lon={longitude}&appid={api_key}&units=metric"
-        try:
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    self.logger.debug(f"Raw OpenWeatherMap data: {json.dumps(data)}")
-                    return data
-                else:
-                    content = await response.text()
-                    self.logger.error(f"Failed to fetch real-world weather data. Status code: {response.status}. Content: {content}")
-                    return None
-        except aiohttp.ClientError as e:
-            self.logger.error(f"Connection error while accessing OpenWeatherMap: {str(e)}")
-            raise
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred while fetching real-world weather: {str(e)}", exc_info=True)
-            return None
-            
-    async def _fetch_nearest_airport(self, lat: float, lon: float) -> Optional[str]:
-        """Fetch the nearest airport ICAO code from Little Navmap."""
-        try:
-            nearest_airport_data = await self._get_data('/nearest_airport', params={"lat": lat, "lon": lon})
-            if nearest_airport_data:
-                icao_code = nearest_airport_data.get("icao")
-                if icao_code:
-                    self.logger.info(f"Nearest airport ICAO: {icao_code}")
-                    return icao_code
-                else:
-                    self.logger.warning("Nearest airport data doesn't contain ICAO code.")
-                    return None  # Or handle this case differently, perhaps return ident
-            return None
-        except Exception as e:
-            self.logger.error(f"Error fetching nearest airport: {e}", exc_info=True)
-            return None
-
-    def _convert_ms_to_kmh(self, speed_ms: float) -> float:
-        """Convert speed from meters per second to kilometers per hour."""
-        return speed_ms * 3.6
-
-    def _convert_ms_to_knots(self, speed_ms: float) -> float:
-        """Convert speed from meters per second to knots."""
-        return speed_ms * 1.943844
-
-    def _convert_meters_to_feet(self, meters: float) -> float:
-        """Convert meters to feet."""
-        return meters * 3.28084
-
-    def _convert_meters_per_second_to_feet_per_minute(self, speed_ms: float) -> float:
-        """Convert speed from meters per second to feet per minute."""
-        return speed_ms * 196.85
-
-    def _spell_out_number(self, number: float) -> str:
-        """Spell out a number for TTS using aviation phrasing."""
-        if number < 0:
-            return f"minus {self._spell_out_number(abs(number))}"
-        
-        parts = str(number).split('.')
-        integer_part = parts[0]
-        decimal_part = parts[1] if len(parts) > 1 else ""
-        
-        words = []
-        for digit in integer_part:
-            if digit == '0':
-                words.append("zero")
-            elif digit == '1':
-                words.append("one")
-            elif digit == '2':
-                words.append("two")
-            elif digit == '3':
-                words.append("tree")  # Corrected spelling
-            elif digit == '4':
-                words.append("four")
-            elif digit == '5':
-                words.append("fife")  # Corrected spelling
-            elif digit == '6':
-                words.append("six")
-            elif digit == '7':
-                words.append("seven")
-            elif digit == '8':
-                words.append("eight")
-            elif digit == '9':
-                words.append("niner")  # Corrected spelling
-        
-        if decimal_part:
-            words.append("point")
-            for digit in decimal_part:
-                if digit == '0':
-                    words.append("zero")
-                elif digit == '1':
-                    words.append("one")
-                elif digit == '2':
-                    words.append("two")
-                elif digit == '3':
-                    words.append("tree")  # Corrected spelling
-                elif digit == '4':
-                    words.append("four")
-                elif digit == '5':
-                    words.append("fife")  # Corrected spelling
-                elif digit == '6':
-                    words.append("six")
-                elif digit == '7':
-                    words.append("seven")
-                elif digit == '8':
-                    words.append("eight")
-                elif digit == '9':
-                    words.append("niner")  # Corrected spelling
-        return " ".join(words)
-
-    async def format_flight_data(self, data: Dict[str, any]) -> str:
-        """Format flight data for chat display."""
-        if not data:
-            return "Unable to retrieve flight data."
-
-        try:
-            # Validate data and provide fallbacks
-            altitude_ft = round(self._convert_meters_to_feet(data.get('indicated_altitude', 0) or 0))
-            ground_speed_kts = max(0, round(self._convert_ms_to_knots(data.get('ground_speed', 0) or 0)))
-            heading = round(data.get('heading', 0) or 0, 1)
-            lat = data.get('position', {}).get('lat', 0) or 0
-            lon = data.get('position', {}).get('lon', 0) or 0
-            wind_speed_kts = round(self._convert_ms_to_knots(data.get('wind_speed', 0) or 0))
-            wind_direction = round(data.get('wind_direction', 0) or 0)
-
-            # Determine flight phase
-            phase = self.get_flight_phase(data)
-
-            # Concurrent API calls
-            nearest_airport_task = asyncio.create_task(self._fetch_nearest_airport(lat, lon))
-            real_weather_task = asyncio.create_task(self._fetch_real_world_weather(lat, lon))
-
-            nearest_icao, real_weather = await asyncio.gather(nearest_airport_task, real_weather_task)
-            
-            airport_message = "Unknown"
-            if nearest_icao:
-                airport_info_task = asyncio.create_task(self.get_airport_info(nearest_icao))
-                airport_info = await airport_info_task
-                if airport_info:
-                    airport_message = self.format_airport_data(airport_info)
-                else:
-                    airport_message = "No airport information found."
-
-            airport_info = f"Nearest Airport: {airport_message}" if nearest_icao else "Airport: Unknown."
-
-            real_weather_info = ""
-            if real_weather:
-                real_temp = real_weather.get("main", {}).get("temp")
-                real_wind_dir = real_weather.get("wind", {}).get("deg")
-                real_wind_speed = round(real_weather.get("wind", {}).get("speed", 0) * 1.943844)
-                real_weather_info = (
-                    f" : Real-World Weather: {real_temp} degrees centigrade.  : Wind {real_wind_dir} degrees at {real_wind_speed} knots."
-                )
-
-
-            # Build the response message
-            return (
-                f"Flight Status - {phase} : "
-                f"Altitude is {altitude_ft:,} feet : "
-                f"Speed currently {ground_speed_kts} knots. : "
-                f"Heading is {heading} degrees. "
-                f"{airport_info}"
-                f"{real_weather_info}"
-            )
-
-        except Exception as e:
-            self.logger.error(f"Error formatting flight data: {e}", exc_info=True)
-            return "Error formatting flight data. Check logs for details."
-
-    async def stop(self):
-        """Close the session properly during shutdown."""
-        if not self.session.closed:
-            await self.session.close()
-        self.logger.info("LittleNavMap integration stopped")
-
-    def get_flight_phase(self, data):
-        """Determine the current flight phase."""
-        try:
-            altitude_agl = self._convert_meters_to_feet(data.get('altitude_above_ground', 0))
-            vertical_speed = self._convert_meters_per_second_to_feet_per_minute(data.get('vertical_speed', 0))
-            ground_speed = self._convert_ms_to_knots(data.get('ground_speed', 0))
-
-            if altitude_agl < 50:
-                if ground_speed < 1:
-                    return "Parked"
-                elif vertical_speed > 100:
-                    return "Taking Off"
-                elif vertical_speed < -100:
-                    return "Landing"
-                else:
-                    return "Ground Roll"
-            else:
-                if vertical_speed > 500:
-                    return "Climbing"
-                elif vertical_speed < -500:
-                    return "Descending"
-                else:
-                    return "Cruise"
-        except Exception as e:
-            self.logger.error(f"Error determining flight phase: {e}", exc_info=True)
-            return "Unknown"
-
-    def _convert_meters_to_feet(self, meters: float) -> float:
-        """Convert meters to feet."""
-        return meters * 3.28084
-
-    def _convert_ms_to_knots(self, speed_ms: float) -> float:
-        """Convert speed from meters per second to knots."""
-        return speed_ms * 1.943844
-
-    def _convert_meters_per_second_to_feet_per_minute(self, speed_ms: float) -> float:
-        """Convert speed from meters per second to feet per minute."""
-        return speed_ms * 196.85
-        
-    def format_brief_status(self, data):
-        """Format a brief status update."""
-        if not data:
-            return "Unable to retrieve status."
-        
-        try:
-            phase = self.get_flight_phase(data)
-            altitude_ft = round(data.get('indicated_altitude', 0))
-            ground_speed_kts = max(0, round(self._convert_ms_to_knots(data.get('ground_speed', 0))))
-            
-            return f"{phase}: {altitude_ft:,} ft, {ground_speed_kts} knots"
-        except Exception as e:
-            self.logger.error(f"Error formatting brief status: {e}", exc_info=True)
-            return "Error formatting status."
-
-    def format_airport_data(self, data):
-        """Format airport data for chat display."""
-        if not data:
-            return "Unable to retrieve airport data."
-        
-        try:
-            
-            name = data.get('name', 'Unknown')
-            ident = data.get('ident', 'Unknown')
-            elevation = data.get('elevation', 'Unknown')
-            
-            runways = data.get('runways', [])
-            runway_info = ""
-            if runways:
-                runway_details = [f"{r.get('designator', 'Unknown')}: {r.get('surface', 'Unknown')}, {r.get('length', 'Unknown')}ft, HDG {r.get('longestRunwayHeading', 'Unknown')}" for r in runways]
-                runway_info = f" : Runways: {', '.join(runway_details)}."
-
-            atis = ""
-            if data.get('com'):
-               if data['com'].get('ATIS:'):
-                   atis = f" : ATIS {data['com'].get('ATIS:')}"
-            tower = ""
-            if data.get('com'):
-              if data['com'].get('Tower:'):
-                 tower = f" : Tower {data['com'].get('Tower:')}"
-            
-            
-            return (
-                f"Airport {ident}: {name}. "
-                f"Elevation: {elevation} feet."
-                 f"{runway_info}"
-                 f"{atis}"
-                 f"{tower}"
-            )
-        except Exception as e:
-            self.logger.error(f"Error formatting airport data: {e}", exc_info=True)
-            return "Error formatting airport data."
-
-    async def format_weather_data(self, data: Dict[str, Any]) -> str:
-        """Format weather data for chat display."""
-        try:
-            if not data:
-                return "No weather data available."
-                
-            wind_direction = round(data.get('wind_direction', 0))
-            wind_speed_kts = round(self._convert_ms_to_knots(data.get('wind_speed', 0)))
-
-            return f"Wind {wind_direction} degrees at {wind_speed_kts} knots"
-        except Exception as e:
-             self.logger.error(f"Error formatting weather data: {e}", exc_info=True)
+# File: littlenavmap_integration.py
+# -*- coding: utf-8 -*-
+import asyncio
+import aiohttp
+import logging
+from src.config import Config
+import json
+import random
+import re
+import socket
+import time
+from typing import Tuple, Optional, Dict, Any, List
+from urllib.parse import quote, urlsplit
+from contextlib import suppress
+from dataclasses import dataclass
+from decimal import Decimal
+
+# orjson is optional; the stdlib parser is used when it isn't installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Unit conversion factors for the SI values Little Navmap reports
+_MPS_TO_KMH = 3.6
+_MPS_TO_KTS = 1.943844
+_M_TO_FT = 3.28084
+_MPS_TO_FPM = 196.85
+
+# Error bodies are only logged, so never read more than this much of one
+_ERROR_PREVIEW_BYTES = 2048
+_OWM_WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+# Sim info is a local call also made at startup, so give up on it sooner than the session default
+_SIM_INFO_TIMEOUT = aiohttp.ClientTimeout(total=3)
+
+# Real-world weather changes over minutes; nearest airport only while the aircraft moves
+_WX_TTL = 300.0
+_NEAREST_AIRPORT_TTL = 30.0
+# Entries per lookup cache; chat can ask for any airport, so the caches must not grow without bound
+_CACHE_MAXSIZE = 512
+
+# ICAO radiotelephony pronunciation of each digit for TTS
+_AVIATION_DIGITS = {
+    '0': "zero", '1': "one", '2': "two", '3': "tree", '4': "four",
+    '5': "fife", '6': "six", '7': "seven", '8': "eight", '9': "niner",
+}
+# Whole-string translation table: each digit becomes its word plus a space
+_AVIATION_TABLE = str.maketrans({
+    **{digit: f"{word} " for digit, word in _AVIATION_DIGITS.items()},
+    '.': "point ",
+    '-': "minus ",
+})
+
+def _num(value, default: float = 0.0) -> float:
+    """Return a sim value, substituting default for a missing or null one."""
+    return value if value is not None else default
+
+def _phase_from(vs_fpm: float, agl_ft: float, gs_kts: float) -> str:
+    """Classify the flight phase from already-converted vertical speed, height and ground speed."""
+    if agl_ft < 50:
+        if gs_kts < 1:
+            return "Parked"
+        elif vs_fpm > 100:
+            return "Taking Off"
+        elif vs_fpm < -100:
+            return "Landing"
+        else:
+            return "Ground Roll"
+    else:
+        if vs_fpm > 500:
+            return "Climbing"
+        elif vs_fpm < -500:
+            return "Descending"
+        else:
+            return "Cruise"
+
+# Consecutive failures before a host is short-circuited, and for how long
+_BREAKER_THRESHOLD = 5
+_BREAKER_COOLDOWN = 30.0
+
+@dataclass
+class _Breaker:
+    """Circuit breaker state for one upstream host."""
+    failures: int = 0
+    opened_at: float = 0.0
+
+    def is_open(self) -> bool:
+        # After the cooldown one request is let through; failing it reopens the breaker
+        return self.failures >= _BREAKER_THRESHOLD and time.monotonic() - self.opened_at < _BREAKER_COOLDOWN
+
+    def record(self, ok: bool):
+        if ok:
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.failures >= _BREAKER_THRESHOLD:
+            self.opened_at = time.monotonic()
+
+def create_client_session() -> aiohttp.ClientSession:
+    """Build an HTTP session tuned for the bot's API traffic; must be called inside the event loop."""
+    return aiohttp.ClientSession(
+        headers={
+            'User-Agent': 'TwitchBot/1.0',
+            'Accept': 'application/json'
+        },
+        connector=aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=20,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            enable_cleanup_closed=True
+        ),
+        timeout=aiohttp.ClientTimeout(total=8, connect=2, sock_read=5)
+    )
+
+class LittleNavmapIntegration:
+    def __init__(self, config, session: Optional[aiohttp.ClientSession] = None):
+        self.config = config
+        self.base_url = self.config.littlenavmap.BASE_URL
+        self.api_base_url = f"{self.config.littlenavmap.BASE_URL}/api" # Corrected base URL
+        self.logger = logging.getLogger("LittleNavmapIntegration")
+        self.openweathermap_api_key = self.config.openweathermap_api_key
+        # A session handed in by the application is shared and closed by its owner
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+        # (monotonic fetch time, data) so callers within one poll window share a fetch
+        self._sim_cache: Tuple[float, Optional[dict]] = (0.0, None)
+        self._airport_cache: Dict[str, Tuple[float, dict]] = {}
+        self._wx_cache: Dict[Tuple[float, float], Tuple[float, dict]] = {}
+        self._nearest_cache: Dict[Tuple[float, float], Tuple[float, str]] = {}
+        # ident -> (airport dict it was built from, chat text)
+        self._airport_text: Dict[str, Tuple[dict, str]] = {}
+        self._breakers: Dict[str, _Breaker] = {}
+        self._poll_task: Optional[asyncio.Task] = None
+        # Fetches in progress, keyed by (cache name, key), so concurrent callers share one request
+        self._inflight: Dict[Tuple[str, Any], asyncio.Task] = {}
+        self.logger.debug("LittleNavmapIntegration initialized with base_url: %s", self.base_url)
+
+    @classmethod
+    async def create(cls, config, session: Optional[aiohttp.ClientSession] = None) -> 'LittleNavmapIntegration':
+        """Build the integration and start it inside the running event loop."""
+        self = cls(config, session=session)
+        await self.start()
+        return self
+
+    async def _init_session(self):
+        """Create the HTTP session if there is no open one."""
+        # One keep-alive session for every poll instead of a new connection per request
+        if self._owns_session and (self.session is None or self.session.closed):
+            self.session = create_client_session()
+
+    async def start(self):
+        """Initialize the integration."""
+        await self._init_session()
+        try:
+            sim_info = await self.get_sim_info()
+            if sim_info:
+                self.logger.info("Successfully connected to LittleNavMap")
+                self.logger.debug("Initial sim info: %s", sim_info)
+            else:
+                self.logger.warning("Could not connect to LittleNavMap on startup")
+        except Exception as e:
+            self.logger.error(f"Error during startup: {e}", exc_info=True)
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = asyncio.create_task(self._poll_sim_info())
+
+    async def _poll_sim_info(self):
+        """Keep the sim info cache warm so chat commands never wait on Little Navmap."""
+        while True:
+            try:
+                await asyncio.sleep(self.config.littlenavmap.UPDATE_INTERVAL)
+                now = time.monotonic()
+                await self._single_flight(
+                    ('sim', None), lambda: self._request_with_retry(lambda: self._request_sim_info(now))
+                )
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.warning(f"Background sim info refresh failed: {e}")
+
+    async def stop(self):
+        """Stop the integration and cleanup."""
+        if self._poll_task:
+            self._poll_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._poll_task
+            self._poll_task = None
+        if self._owns_session and self.session and not self.session.closed:
+            await self.session.close()
+        self.logger.info("LittleNavMap integration stopped")
+
+    async def _error_preview(self, response: aiohttp.ClientResponse) -> str:
+        """Read the start of an error response body for logging."""
+        preview = await response.content.read(_ERROR_PREVIEW_BYTES)
+        return preview.decode('utf-8', errors='replace')
+
+    def invalidate_cache(self):
+        """Drop cached sim and airport data so the next call refetches."""
+        self._sim_cache = (0.0, None)
+        self._airport_cache.clear()
+        self._wx_cache.clear()
+        self._nearest_cache.clear()
+        self._airport_text.clear()
+
+    def _breaker(self, url: str) -> _Breaker:
+        """Return the circuit breaker for the host a URL points at."""
+        host = urlsplit(url).netloc
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = _Breaker()
+        return breaker
+
+    async def _coalesced(self, name: str, cache: Dict, key, ttl: float, fetch):
+        """Serve key from cache while fresh, otherwise share one fetch() between concurrent callers."""
+        hit = cache.get(key)
+        if hit is not None and time.monotonic() - hit[0] < ttl:
+            return hit[1]
+
+        async def run():
+            data = await fetch()
+            if data:
+                # Re-inserting keeps the dict in fetch order, so the first entry is the stalest
+                cache.pop(key, None)
+                if len(cache) >= _CACHE_MAXSIZE:
+                    del cache[next(iter(cache))]
+                cache[key] = (time.monotonic(), data)
+            return data
+        return await self._single_flight((name, key), run)
+
+    async def _single_flight(self, key, fetch):
+        """Run fetch() at most once at a time per key; concurrent callers await the same result."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller being cancelled does not abort the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _request_with_retry(self, coro_factory, *, max_tries: int = 3, base: float = 1.0, cap: float = 30.0):
+        """Await coro_factory() again after recoverable failures, with jittered exponential backoff."""
+        deadline = time.monotonic() + cap
+        for attempt in range(max_tries):
+            try:
+                return await coro_factory()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # 4xx and DNS failures will not fix themselves by retrying
+                if isinstance(e, aiohttp.ClientResponseError) and e.status < 500:
+                    raise
+                if isinstance(getattr(e, 'os_error', None), socket.gaierror):
+                    raise
+                delay = min(cap, base * 2 ** attempt) * (1 + random.random() * 0.5)
+                if attempt == max_tries - 1 or time.monotonic() + delay > deadline:
+                    raise
+                self.logger.warning(f"Request failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def get_sim_info(self):
+        """Retrieve simulation information from LittleNavMap."""
+        now = time.monotonic()
+        fetched_at, cached = self._sim_cache
+        # While the poller runs the cache is refreshed every interval; allow one missed tick
+        max_age = self.config.littlenavmap.UPDATE_INTERVAL
+        if self._poll_task is not None and not self._poll_task.done():
+            max_age *= 2
+        if cached is not None and now - fetched_at < max_age:
+            return cached
+        return await self._single_flight(
+            ('sim', None), lambda: self._request_with_retry(lambda: self._request_sim_info(now))
+        )
+
+    async def _request_sim_info(self, now: float) -> Optional[dict]:
+        """Query Little Navmap for the current simulator state."""
+        endpoint = f"{self.base_url}/sim/info"
+        breaker = self._breaker(endpoint)
+        if breaker.is_open():
+            return None
+        try:
+            async with self.session.get(endpoint, timeout=_SIM_INFO_TIMEOUT) as response:
+                breaker.record(response.status < 500)
+                if response.status == 200:
+                    data = await response.json(loads=_json_loads, content_type=None)
+                    self._sim_cache = (now, data)
+                    return data
+                else:
+                    content = await self._error_preview(response)
+                    self.logger.error(f"Failed to get sim info. Status: {response.status}, Content: {content}")
+                    return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            breaker.record(False)
+            self.logger.error(f"Connection error fetching sim info: {e}")
+            raise
+        except Exception as e:
+            self.logger.error(f"Error fetching simulation info: {e}", exc_info=True)
+            return None
+
+    async def get_airport_info(self, ident: str):
+        """Get information about a specific airport."""
+        ident = ident.lower()
+        return await self._coalesced(
+            'airport', self._airport_cache, ident, self.config.littlenavmap.CACHE_TTL,
+            lambda: self._request_with_retry(lambda: self._get_data(f'/airport/info', params={"ident": ident}))
+        )
+
+    async def get_bundle(self, idents: List[str]) -> Tuple[Optional[dict], List[Optional[dict]]]:
+        """Fetch sim info and several airports concurrently."""
+        # Requests overlap on the shared session, so wall time is the slowest call, not the sum
+        async with asyncio.TaskGroup() as tg:
+            sim_task = tg.create_task(self.get_sim_info())
+            airport_tasks = [tg.create_task(self.get_airport_info(ident)) for ident in idents]
+        return sim_task.result(), [task.result() for task in airport_tasks]
+    
+    async def get_current_flight_data(self):
+        """Get current flight data."""
+        sim_info = await self.get_sim_info()
+        if sim_info:
+            return {
+                'aircraft': {
+                    'altitude': sim_info.get('indicated_altitude', 0),
+                    'speed': self._convert_ms_to_kmh(sim_info.get('ground_speed', 0)),
+                    'heading': sim_info.get('heading', 0),
+                    'latitude': sim_info.get('position', {}).get('lat', 0),
+                    'longitude': sim_info.get('position', {}).get('lon', 0),
+                    'wind_direction': sim_info.get('wind_direction', 0),
+                    'wind_speed': self._convert_ms_to_kmh(sim_info.get('wind_speed', 0)),
+                    'on_ground': sim_info.get('on_ground', False)
+                }
+            }
+        return None
+
+    async def _get_data(self, endpoint: str, params: Optional[Dict] = None):
+        """Helper function to make a request to a specific API endpoint."""
+        url = f"{self.api_base_url}{endpoint[1:]}" # Removed leading slash from endpoint
+        breaker = self._breaker(url)
+        if breaker.is_open():
+            return None
+
+        try:
+            async with self.session.get(url, params=params) as response:
+                # One debug line per request rather than one per stage
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("GET %s -> %s (%d bytes)", url, response.status, response.content_length or 0)
+
+                if response.status == 200:
+                    breaker.record(True)
+                    data = await response.json(loads=_json_loads, content_type=None)
+                    self.logger.info("Successfully retrieved data from %s", endpoint)
+                    return data
+
+                # The body is only worth reading when reporting a failure, and only its start
+                content = await self._error_preview(response)
+                if response.status == 404:
+                    self.logger.error(f"Failed to retrieve data from {endpoint}. Status code: {response.status}. Content: {content}. Check Little Navmap web server and API path.")
+                    return None
+                elif response.status >= 500:
+                     self.logger.error(f"Server error when accessing {url}. Status code: {response.status}. Content: {content}")
+                     raise aiohttp.ClientError(f"Server error when accessing {url}. Status code: {response.status}")
+                else:
+                    self.logger.error(f"Failed to retrieve data from {endpoint}. Status code: {response.status}. Content: {content}")
+                    return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Covers the 5xx case above as well as connection failures and timeouts
+            breaker.record(False)
+            self.logger.error(f"Connection error while accessing {url}: {str(e)}")
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred: {str(e)}", exc_info=True)
+            return None
+
+    async def _fetch_real_world_weather(self, latitude: float, longitude: float) -> Optional[dict]:
+        """Fetch real-world weather data using OpenWeatherMap API, for the position snapped to a ~1 km grid."""
+        api_key = self.config.openweathermap_api_key
+        if not api_key:
+            self.logger.warning("OpenWeatherMap API key not configured.")
+            return None
+        # Two decimals: nearby samples share one cache entry and the query uses the same point
+        key = lat_q, lon_q = round(latitude, 2), round(longitude, 2)
+        return await self._coalesced(
+            'wx', self._wx_cache, key, _WX_TTL,
+            lambda: self._request_with_retry(lambda: self._request_real_world_weather(lat_q, lon_q, api_key))
+        )
+
+    async def _request_real_world_weather(self, latitude: float, longitude: float, api_key: str) -> Optional[dict]:
+        """Query OpenWeatherMap for the current weather at a position."""
+        params = {"lat": latitude, "lon": longitude, "appid": api_key, "units": "metric"}
+        breaker = self._breaker(_OWM_WEATHER_URL)
+        if breaker.is_open():
+            return None
+        try:
+            async with self.session.get(_OWM_WEATHER_URL, params=params) as response:
+                breaker.record(response.status < 500)
+                if response.status == 200:
+                    data = await response.json(loads=_json_loads, content_type=None)
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug("Raw OpenWeatherMap data: %s", data)
+                    return data
+                else:
+                    content = await self._error_preview(response)
+                    self.logger.error(f"Failed to fetch real-world weather data. Status code: {response.status}. Content: {content}")
+                    return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            breaker.record(False)
+            self.logger.error(f"Connection error while accessing OpenWeatherMap: {str(e)}")
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred while fetching real-world weather: {str(e)}", exc_info=True)
+            return None
+            
+    async def _fetch_nearest_airport(self, lat: float, lon: float) -> Optional[str]:
+        """Fetch the nearest airport ICAO code from Little Navmap, for the position snapped to a ~10 km grid."""
+        # One decimal: the nearest airport rarely changes within a cell this size
+        key = lat_q, lon_q = round(lat, 1), round(lon, 1)
+        return await self._coalesced(
+            'nearest', self._nearest_cache, key, _NEAREST_AIRPORT_TTL,
+            lambda: self._request_nearest_airport(lat_q, lon_q)
+        )
+
+    async def _request_nearest_airport(self, lat: float, lon: float) -> Optional[str]:
+        """Ask Little Navmap for the airport closest to a position."""
+        try:
+            nearest_airport_data = await self._get_data('/nearest_airport', params={"lat": lat, "lon": lon})
+            if nearest_airport_data:
+                icao_code = nearest_airport_data.get("icao")
+                if icao_code:
+                    self.logger.info(f"Nearest airport ICAO: {icao_code}")
+                    return icao_code
+                else:
+                    self.logger.warning("Nearest airport data doesn't contain ICAO code.")
+                    return None  # Or handle this case differently, perhaps return ident
+            return None
+        except Exception as e:
+            self.logger.error(f"Error fetching nearest airport: {e}", exc_info=True)
+            return None
+
+    async def _nearest_then_info(self, lat: float, lon: float) -> Tuple[Optional[str], Optional[dict]]:
+        """Find the nearest airport and fetch its details."""
+        icao = await self._fetch_nearest_airport(lat, lon)
+        if not icao:
+            return None, None
+        return icao, await self.get_airport_info(icao)
+
+    def _convert_ms_to_kmh(self, speed_ms: float) -> float:
+        """Convert speed from meters per second to kilometers per hour."""
+        return speed_ms * _MPS_TO_KMH
+
+    def _spell_out_number(self, number: float) -> str:
+        """Spell out a number for TTS using aviation phrasing."""
+        text = str(number)
+        if 'e' in text:
+            # Very large or small floats print as 1e+16; spell out the fixed-point digits instead
+            text = format(Decimal(text), 'f')
+        return text.translate(_AVIATION_TABLE).strip()
+
+    async def format_flight_data(self, data: Dict[str, any]) -> str:
+        """Format flight data for chat display."""
+        if not data:
+            return "Unable to retrieve flight data."
+
+        try:
+            # Validate data and provide fallbacks; each raw value is read and converted once
+            get = data.get
+            gs_kts = _num(get('ground_speed')) * _MPS_TO_KTS
+            altitude_ft = round(_num(get('indicated_altitude')) * _M_TO_FT)
+            ground_speed_kts = max(0, round(gs_kts))
+            # float() first: round() keeps an int heading an int, and int has no is_integer() before 3.12
+            heading = float(round(_num(get('heading')), 1))
+            # "270" reads better over TTS than "270.0"
+            if heading.is_integer():
+                heading = int(heading)
+            position = get('position') or {}
+            lat = _num(position.get('lat'))
+            lon = _num(position.get('lon'))
+
+            # Determine flight phase
+            phase = _phase_from(
+                _num(get('vertical_speed')) * _MPS_TO_FPM,
+                _num(get('altitude_above_ground')) * _M_TO_FT,
+                gs_kts
+            )
+
+            # Concurrent API calls; the airport lookup chains off the nearest-airport result
+            (nearest_icao, airport_info), real_weather = await asyncio.gather(
+                self._nearest_then_info(lat, lon),
+                self._fetch_real_world_weather(lat, lon)
+            )
+            
+            airport_message = "Unknown"
+            if nearest_icao:
+                if airport_info:
+                    airport_message = self.format_airport_data(airport_info)
+                else:
+                    airport_message = "No airport information found."
+
+            airport_info = f"Nearest Airport: {airport_message}" if nearest_icao else "Airport: Unknown."
+
+            real_weather_info = ""
+            if real_weather:
+                real_temp = real_weather.get("main", {}).get("temp")
+                real_wind_dir = real_weather.get("wind", {}).get("deg")
+                real_wind_speed = round(real_weather.get("wind", {}).get("speed", 0) * _MPS_TO_KTS)
+                real_weather_info = (
+                    f" : Real-World Weather: {real_temp} degrees centigrade.  : Wind {real_wind_dir} degrees at {real_wind_speed} knots."
+                )
+
+
+            # Build the response message
+            return (
+                f"Flight Status - {phase} : "
+                f"Altitude is {altitude_ft:,} feet : "
+                f"Speed currently {ground_speed_kts} knots. : "
+                f"Heading is {heading} degrees. "
+                f"{airport_info}"
+                f"{real_weather_info}"
+            )
+
+        except Exception as e:
+            self.logger.error(f"Error formatting flight data: {e}", exc_info=True)
+            return "Error formatting flight data. Check logs for details."
+
+    def get_flight_phase(self, data):
+        """Determine the current flight phase."""
+        if not data:
+            return "Unknown"
+        try:
+            get = data.get
+            return _phase_from(
+                get('vertical_speed', 0) * _MPS_TO_FPM,
+                get('altitude_above_ground', 0) * _M_TO_FT,
+                get('ground_speed', 0) * _MPS_TO_KTS
+            )
+        except Exception as e:
+            self.logger.error(f"Error determining flight phase: {e}", exc_info=True)
+            return "Unknown"
+
+
+    def format_brief_status(self, data):
+        """Format a brief status update."""
+        if not data:
+            return "Unable to retrieve status."
+        
+        try:
+            phase = self.get_flight_phase(data)
+            altitude_ft = round(data.get('indicated_altitude', 0))
+            ground_speed_kts = max(0, round(data.get('ground_speed', 0) * _MPS_TO_KTS))
+            
+            return f"{phase}: {altitude_ft:,} ft, {ground_speed_kts} knots"
+        except Exception as e:
+            self.logger.error(f"Error formatting brief status: {e}", exc_info=True)
+            return "Error formatting status."
+
+    def format_airport_data(self, data):
+        """Format airport data for chat display."""
+        if not data:
+            return "Unable to retrieve airport data."
+        
+        try:
+            ident = data.get('ident', 'Unknown')
+            # get_airport_info hands back the same dict while it is cached, so its text can be reused
+            cached = self._airport_text.get(ident)
+            if cached is not None and cached[0] is data:
+                return cached[1]
+
+            name = data.get('name', 'Unknown')
+            elevation = data.get('elevation', 'Unknown')
+            
+            runways = data.get('runways', [])
+            runway_info = ""
+            if runways:
+                runway_details = [f"{r.get('designator', 'Unknown')}: {r.get('surface', 'Unknown')}, {r.get('length', 'Unknown')}ft, HDG {r.get('longestRunwayHeading', 'Unknown')}" for r in runways]
+                runway_info = f" : Runways: {', '.join(runway_details)}."
+
+            com = data.get('com') or {}
+            atis_freq = com.get('ATIS:')
+            atis = f" : ATIS {atis_freq}" if atis_freq else ""
+            tower_freq = com.get('Tower:')
+            tower = f" : Tower {tower_freq}" if tower_freq else ""
+
+            text = (
+                f"Airport {ident}: {name}. "
+                f"Elevation: {elevation} feet."
+                 f"{runway_info}"
+                 f"{atis}"
+                 f"{tower}"
+            )
+            # Bounded like the lookup caches, and it pins the airport dicts it holds
+            self._airport_text.pop(ident, None)
+            if len(self._airport_text) >= _CACHE_MAXSIZE:
+                del self._airport_text[next(iter(self._airport_text))]
+            self._airport_text[ident] = (data, text)
+            return text
+        except Exception as e:
+            self.logger.error(f"Error formatting airport data: {e}", exc_info=True)
+            return "Error formatting airport data."
+
+    async def format_weather_data(self, data: Dict[str, Any]) -> str:
+        """Format weather data for chat display."""
+        try:
+            if not data:
+                return "No weather data available."
+                
+            wind_direction = round(data.get('wind_direction', 0))
+            wind_speed_kts = round(data.get('wind_speed', 0) * _MPS_TO_KTS)
+
+            return f"Wind {wind_direction} degrees at {wind_speed_kts} knots"
+        except Exception as e:
+             self.logger.error(f"Error formatting weather data: {e}", exc_info=True)
              return "Error formatting weather data"
\ No newline at end of file
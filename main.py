@@ -1,318 +1,468 @@
-# File: main.py
-import asyncio
-import logging
-from logging.handlers import RotatingFileHandler
-import sys
-from pathlib import Path
-import signal
-from typing import Optional
-import json
-import os
-
-import sentry_sdk
-from openai import AsyncOpenAI
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src'))) # Added path to the src directory
-from src.config import Config, load_config, ConfigError
-from src.bot import Bot
-from src.database_manager import DatabaseManager
-from src.tts_manager import TTSManager
-from src.chat_manager import ChatManager
-from src.command_handler import CommandHandler
-from src.littlenavmap_integration import LittleNavmapIntegration
-from src.personality import PersonalityManager
-# Add Aviation Weather Dependency
-from src.aviation_weather_integration import AviationWeatherIntegration
-
-class JsonFormatter(logging.Formatter):
-    def format(self, record):
-        log_data = {
-            "time": self.formatTime(record, self.datefmt),
-            "level": record.levelname,
-            "name": record.name,
-            "message": record.getMessage(),
-            "filename": record.filename,
-            "lineno": record.lineno,
-            "funcName": record.funcName,
-            "threadName": record.threadName,
-            "process": record.process
-            
-        }
-        if record.exc_info:
-            log_data["exc_info"] = self.formatException(record.exc_info)
-            
-        return json.dumps(log_data)
-
-class BotApplication:
-    def __init__(self):
-        self.logger = self.setup_logging()
-        self.config: Optional[Config] = None
-        self.bot: Optional[Bot] = None
-        self.shutdown_event = asyncio.Event()
-        
-    def setup_logging(self) -> logging.Logger:
-        """Setup logging configuration."""
-        logger = logging.getLogger('BotApplication')
-        logger.setLevel(logging.INFO)
-
-        # Create logs directory if it doesn't exist
-        Path("logs").mkdir(exist_ok=True)
-
-        # Console handler
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter(
-            '%(asctime)s - %(levelname)s - %(message)s'
-        )
-        console_handler.setFormatter(console_formatter)
-
-        # File handler
-        file_handler = RotatingFileHandler(
-            'logs/bot.log',
-            maxBytes=10485760,  # 10MB
-            backupCount=5
-        )
-        file_handler.setLevel(logging.DEBUG)
-        file_formatter = JsonFormatter()
-        file_handler.setFormatter(file_formatter)
-
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
-
-        return logger
-
-    async def initialize(self):
-        """Initialize all bot components."""
-        try:
-            self.logger.info("Starting bot initialization...")
-            
-            # Load configuration
-            try:
-                self.config = load_config()
-                self.logger.info("Configuration loaded successfully")
-            except ConfigError as e:
-                self.logger.error(f"Configuration Error: {e}")
-                raise
-
-            # Initialize Sentry
-            if self.config.is_production and self.config.sentry_dsn:
-                sentry_sdk.init(
-                    dsn=self.config.sentry_dsn,
-                    traces_sample_rate=1.0
-                )
-                self.logger.info("Sentry initialized")
-
-            # Initialize OpenAI client
-            try:
-                openai_client = AsyncOpenAI(api_key=self.config.openai.API_KEY)
-                self.logger.info("OpenAI client initialized")
-            except Exception as e:
-                self.logger.error(f"Error initializing OpenAI client: {e}")
-                raise
-                
-
-            # Initialize database manager
-            try:
-                db_manager = DatabaseManager(self.config)
-                await db_manager.connect()
-                self.logger.info("Database connection established")
-            except Exception as e:
-                 self.logger.error(f"Error initializing database manager: {e}")
-                 raise
-
-            # Initialize TTS manager
-            try:
-                tts_manager = TTSManager(self.config)
-                await tts_manager.start()
-                self.logger.info("TTS manager initialized")
-            except Exception as e:
-                self.logger.error(f"Error initializing TTS manager: {e}")
-                raise
-
-
-            # Initialize LittleNavmap integration
-            try:
-                navmap = LittleNavmapIntegration(self.config)
-                await navmap.start()
-                self.logger.info("LittleNavmap integration initialized")
-            except Exception as e:
-                 self.logger.error(f"Error initializing LittleNavmap integration: {e}")
-                 raise
-            
-            # Initialize Aviation Weather integration
-            try:
-                aviation_weather = AviationWeatherIntegration(self.config)
-                await aviation_weather.start()
-                self.logger.info("Aviation weather integration initialized")
-            except Exception as e:
-                self.logger.error(f"Error initializing Aviation weather integration: {e}")
-                raise
-
-            # Initialize personality manager
-            try:
-                personality = PersonalityManager()
-                personality.load_state()
-                self.logger.info("Personality manager initialized")
-            except Exception as e:
-                 self.logger.error(f"Error initializing Personality manager: {e}")
-                 raise
-
-            # Initialize bot instance
-            try:
-                self.bot = Bot(
-                    openai_client=openai_client,
-                    config=self.config,
-                    db_manager=db_manager,
-                    tts_manager=tts_manager,
-                    littlenavmap=navmap,
-                    personality=personality,
-                    aviation_weather = aviation_weather # Added AviationWeatherIntegration
-                )
-            except Exception as e:
-                  self.logger.error(f"Error initializing bot instance: {e}")
-                  raise
-
-            # Initialize chat manager
-            try:
-                 chat_manager = ChatManager(self.bot, self.config)
-                 await chat_manager.start()
-                 self.logger.info("Chat manager initialized")
-            except Exception as e:
-                 self.logger.error(f"Error initializing Chat manager: {e}")
-                 raise
-
-
-            # Initialize command handler
-            try:
-                command_handler = CommandHandler(self.bot)  # Only pass the bot instance
-                command_handler.aviation_weather = aviation_weather  # Set the aviation weather integration
-                self.logger.info("Command handler initialized")
-            except Exception as e:
-                 self.logger.error(f"Error initializing Command handler: {e}")
-                 raise
-
-            # Set up components in bot
-            self.bot.chat_manager = chat_manager
-            self.bot.command_handler = command_handler
-            
-            self.logger.info("Bot initialization completed successfully")
-
-        except Exception as e:
-            self.logger.error(f"Error during initialization: {e}", exc_info=True)
-            raise
-
-    async def shutdown(self):
-        """Gracefully shutdown all components."""
-        self.logger.info("Initiating shutdown sequence...")
-        
-        try:
-            if self.bot:
-                # Save personality state
-                if hasattr(self.bot, 'personality'):
-                    try:
-                       self.bot.personality.save_state()
-                       self.logger.info("Personality state saved")
-                    except Exception as e:
-                        self.logger.error(f"Error saving personality: {e}")
-
-                # Close TTS manager
-                if hasattr(self.bot, 'tts_manager'):
-                    try:
-                        await self.bot.tts_manager.close()
-                        self.logger.info("TTS manager closed")
-                    except Exception as e:
-                        self.logger.error(f"Error closing TTS manager: {e}")
-
-                # Close database connection
-                if hasattr(self.bot, 'db_manager'):
-                    try:
-                       await self.bot.db_manager.close()
-                       self.logger.info("Database connection closed")
-                    except Exception as e:
-                       self.logger.error(f"Error closing database manager: {e}")
-                       
-                # Close LittleNavmap integration
-                if hasattr(self.bot, 'littlenavmap'):
-                   try:
-                        await self.bot.littlenavmap.stop()
-                        self.logger.info("LittleNavmap integration stopped")
-                   except Exception as e:
-                       self.logger.error(f"Error stopping LNM integration: {e}")
-
-                 # Close Aviation Weather Integration
-                if hasattr(self.bot, 'aviation_weather'):
-                  try:
-                      await self.bot.aviation_weather.stop()
-                      self.logger.info("Aviation Weather integration stopped")
-                  except Exception as e:
-                      self.logger.error(f"Error stopping Aviation Weather integration: {e}")
-
-
-                # Close chat manager
-                if hasattr(self.bot, 'chat_manager') and self.bot.chat_manager:
-                    try:
-                        await self.bot.chat_manager.close()
-                        self.logger.info("Chat manager closed")
-                    except Exception as e:
-                        self.logger.error(f"Error closing chat manager: {e}")
-
-                # Close bot
-                try:
-                   await self.bot.close()
-                   self.logger.info("Bot closed")
-                except Exception as e:
-                     self.logger.error(f"Error closing bot: {e}")
-
-            self.logger.info("Shutdown sequence completed")
-            
-        except Exception as e:
-            self.logger.error(f"Error during shutdown: {e}")
-            raise
-        finally:
-            self.shutdown_event.set()
-
-    def setup_signal_handlers(self):
-        """Setup signal handlers for graceful shutdown."""
-        def signal_handler(sig, frame):
-            self.logger.info(f"Shutdown signal {sig} received")
-            asyncio.create_task(self.shutdown())
-
-        try:
-            for sig in (signal.SIGTERM, signal.SIGINT):
-                signal.signal(sig, signal_handler)
-        except NotImplementedError:
-            # Windows doesn't support SIGTERM
-            pass
-
-    async def run(self):
-        """Main run method."""
-        try:
-            await self.initialize()
-            self.setup_signal_handlers()
-            
-            self.logger.info("Starting bot...")
-            if self.bot:
-                await self.bot.start()
-            
-            # Keep running until shutdown event is set
-            await self.shutdown_event.wait()
-            
-        except Exception as e:
-            self.logger.error(f"Error in main loop: {e}", exc_info=True)
-            await self.shutdown()
-        finally:
-            self.logger.info("Bot application terminated")
-
-def main():
-    """Entry point for the application."""
-    app = BotApplication()
-    
-    try:
-        asyncio.run(app.run())
-    except KeyboardInterrupt:
-        print("\nShutdown initiated by user")
-    except Exception as e:
-        print(f"Fatal error: {e}")
-        sys.exit(1)
-
-if __name__ == "__main__":
+# File: main.py
+import asyncio
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import sys
+from pathlib import Path
+import signal
+from typing import Optional
+import json
+import copy
+import importlib
+import queue
+import threading
+import time
+from contextlib import suppress
+
+import aiohttp
+from src.config import Config, load_config, ConfigError
+from src.bot import Bot
+from src.database_manager import DatabaseManager
+from src.tts_manager import TTSManager
+from src.chat_manager import ChatManager
+from src.command_handler import CommandHandler
+from src.littlenavmap_integration import LittleNavmapIntegration, create_client_session
+from src.personality import PersonalityManager
+# Add Aviation Weather Dependency
+from src.aviation_weather_integration import AviationWeatherIntegration
+
+# Same instance as BotApplication.logger; used for fatal errors outside the event loop
+logger = logging.getLogger('BotApplication')
+
+# Signals that start a graceful shutdown
+_SHUTDOWN_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+
+# orjson is optional; the stdlib encoder is used when it isn't installed
+try:
+    import orjson
+
+    def _json_dumps(data: dict) -> str:
+        return orjson.dumps(data).decode()
+except ImportError:
+    _json_dumps = json.dumps
+
+class JsonFormatter(logging.Formatter):
+    # The "%Y-%m-%d %H:%M:%S" prefix of the last second formatted; records arrive many per second
+    _cached_second = (None, "")
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, prefix = self._cached_second
+        if second != cached_second:
+            prefix = time.strftime(self.default_time_format, self.converter(record.created))
+            self._cached_second = (second, prefix)
+        return self.default_msec_format % (prefix, record.msecs)
+
+    def format(self, record, _dumps=_json_dumps):
+        log_data = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+            "filename": record.filename,
+            "lineno": record.lineno,
+            "funcName": record.funcName,
+            "threadName": record.threadName,
+            "process": record.process
+        }
+        exc_info = record.exc_info
+        if exc_info:
+            log_data["exc_info"] = self.formatException(exc_info)
+
+        return _dumps(log_data)
+
+class RecordQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Resolve the message now, since args may change later, but keep exc_info for JsonFormatter
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+class BotApplication:
+    def __init__(self):
+        self.logger = self.setup_logging()
+        self.config: Optional[Config] = None
+        self.bot: Optional[Bot] = None
+        # One connection pool shared by every HTTP integration
+        self._http: Optional[aiohttp.ClientSession] = None
+        # Shutdown started from a signal; run() awaits it so asyncio.run can't cancel it halfway
+        self._shutdown_task: Optional[asyncio.Task] = None
+        self._shutdown_started = False
+        self.shutdown_event = asyncio.Event()
+        
+    def setup_logging(self) -> logging.Logger:
+        """Setup logging configuration."""
+        logger = logging.getLogger('BotApplication')
+        logger.setLevel(logging.INFO)
+
+        # Create logs directory if it doesn't exist
+        Path("logs").mkdir(exist_ok=True)
+
+        # Console handler
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(logging.INFO)
+        console_formatter = logging.Formatter(
+            '%(asctime)s - %(levelname)s - %(message)s'
+        )
+        console_handler.setFormatter(console_formatter)
+
+        # File handler
+        file_handler = RotatingFileHandler(
+            'logs/bot.log',
+            maxBytes=10485760,  # 10MB
+            backupCount=5,
+            encoding='utf-8'  # orjson emits raw UTF-8 rather than \u escapes
+        )
+        file_handler.setLevel(logging.DEBUG)
+        file_formatter = JsonFormatter()
+        file_handler.setFormatter(file_formatter)
+
+        # JSON formatting and disk writes happen on a listener thread, not on the event loop
+        log_queue = queue.SimpleQueue()
+        queue_handler = RecordQueueHandler(log_queue)
+        self._log_listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        self._log_listener.start()
+        # Safety net for exits that bypass main(); stop_logging is idempotent
+        atexit.register(self.stop_logging)
+
+        logger.addHandler(console_handler)
+        logger.addHandler(queue_handler)
+
+        # The Little Navmap integration leaves handler setup to the application
+        navmap_logger = logging.getLogger('LittleNavmapIntegration')
+        navmap_logger.setLevel(logging.INFO)
+        navmap_logger.addHandler(console_handler)
+        navmap_logger.addHandler(queue_handler)
+
+        return logger
+
+    def stop_logging(self):
+        """Drain queued records into the log file and stop the listener thread."""
+        listener, self._log_listener = self._log_listener, None
+        if listener is not None:
+            listener.stop()
+
+    async def initialize(self):
+        """Initialize all bot components."""
+        try:
+            self.logger.info("Starting bot initialization...")
+            
+            # Load configuration
+            try:
+                self.config = load_config()
+                self.logger.info("Configuration loaded successfully")
+            except ConfigError as e:
+                self.logger.error(f"Configuration Error: {e}")
+                raise
+
+            # Initialize Sentry
+            if self.config.is_production and self.config.sentry_dsn:
+                import sentry_sdk  # Only pulled in when it is actually used
+                sentry_sdk.init(
+                    dsn=self.config.sentry_dsn,
+                    traces_sample_rate=1.0
+                )
+                self.logger.info("Sentry initialized")
+
+            # Initialize personality manager
+            try:
+                personality = PersonalityManager()
+                personality.load_state()
+                self.logger.info("Personality manager initialized")
+            except Exception as e:
+                 self.logger.error(f"Error initializing Personality manager: {e}")
+                 raise
+
+            self._http = create_client_session()
+
+            # The network-bound components don't depend on each other; connect them concurrently
+            results = await asyncio.gather(
+                self._init_openai(),
+                self._init_db(),
+                self._init_tts(),
+                self._init_navmap(),
+                self._init_weather(),
+                return_exceptions=True
+            )
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                raise errors[0]
+            openai_client, db_manager, tts_manager, navmap, aviation_weather = results
+
+            # Initialize bot instance
+            try:
+                self.bot = Bot(
+                    openai_client=openai_client,
+                    config=self.config,
+                    db_manager=db_manager,
+                    tts_manager=tts_manager,
+                    littlenavmap=navmap,
+                    personality=personality,
+                    aviation_weather = aviation_weather # Added AviationWeatherIntegration
+                )
+            except Exception as e:
+                  self.logger.error(f"Error initializing bot instance: {e}")
+                  raise
+
+            # Initialize chat manager
+            try:
+                 chat_manager = ChatManager(self.bot, self.config)
+                 await chat_manager.start()
+                 self.logger.info("Chat manager initialized")
+            except Exception as e:
+                 self.logger.error(f"Error initializing Chat manager: {e}")
+                 raise
+
+
+            # Initialize command handler
+            try:
+                command_handler = CommandHandler(self.bot)  # Only pass the bot instance
+                command_handler.aviation_weather = aviation_weather  # Set the aviation weather integration
+                await command_handler.start()
+                self.logger.info("Command handler initialized")
+            except Exception as e:
+                 self.logger.error(f"Error initializing Command handler: {e}")
+                 raise
+
+            # Set up components in bot
+            self.bot.chat_manager = chat_manager
+            self.bot.command_handler = command_handler
+            
+            self.logger.info("Bot initialization completed successfully")
+
+        except Exception as e:
+            self.logger.error(f"Error during initialization: {e}", exc_info=True)
+            raise
+
+    async def _init_openai(self):
+        """Create the OpenAI client, importing the SDK off the event loop."""
+        try:
+            # openai pulls in httpx, pydantic and friends; import it while the other components connect
+            openai = await asyncio.to_thread(importlib.import_module, 'openai')
+            openai_client = openai.AsyncOpenAI(api_key=self.config.openai.API_KEY)
+            self.logger.info("OpenAI client initialized")
+            return openai_client
+        except Exception as e:
+            self.logger.error(f"Error initializing OpenAI client: {e}")
+            raise
+
+    async def _init_db(self) -> DatabaseManager:
+        """Connect the database manager."""
+        try:
+            db_manager = DatabaseManager(self.config)
+            await db_manager.connect()
+            self.logger.info("Database connection established")
+            return db_manager
+        except Exception as e:
+            self.logger.error(f"Error initializing database manager: {e}")
+            raise
+
+    async def _init_tts(self) -> TTSManager:
+        """Start the TTS manager."""
+        try:
+            tts_manager = TTSManager(self.config)
+            await tts_manager.start()
+            self.logger.info("TTS manager initialized")
+            return tts_manager
+        except Exception as e:
+            self.logger.error(f"Error initializing TTS manager: {e}")
+            raise
+
+    async def _init_navmap(self) -> LittleNavmapIntegration:
+        """Start the LittleNavmap integration on the shared HTTP session."""
+        try:
+            navmap = await LittleNavmapIntegration.create(self.config, session=self._http)
+            self.logger.info("LittleNavmap integration initialized")
+            return navmap
+        except Exception as e:
+            self.logger.error(f"Error initializing LittleNavmap integration: {e}")
+            raise
+
+    async def _init_weather(self) -> AviationWeatherIntegration:
+        """Start the Aviation Weather integration on the shared HTTP session."""
+        try:
+            aviation_weather = AviationWeatherIntegration(self.config, session=self._http)
+            await aviation_weather.start()
+            self.logger.info("Aviation weather integration initialized")
+            return aviation_weather
+        except Exception as e:
+            self.logger.error(f"Error initializing Aviation weather integration: {e}")
+            raise
+
+    async def shutdown(self):
+        """Gracefully shutdown all components."""
+        self._shutdown_started = True
+        self.logger.info("Initiating shutdown sequence...")
+        
+        try:
+            if self.bot:
+                # Stop the producers first so drained messages still have a live DB and TTS to use
+                await self._close_chat_pipeline()
+
+                # The sinks are independent of each other and close concurrently; the bot itself goes last
+                bot = self.bot
+                personality = getattr(bot, 'personality', None)
+                tts_manager = getattr(bot, 'tts_manager', None)
+                db_manager = getattr(bot, 'db_manager', None)
+                littlenavmap = getattr(bot, 'littlenavmap', None)
+                aviation_weather = getattr(bot, 'aviation_weather', None)
+                steps = []
+                if personality is not None:
+                    steps.append(self._close_step(
+                        asyncio.to_thread(personality.write_state, personality.snapshot_state()),
+                        "Personality state saved", "Error saving personality"))
+                if tts_manager is not None:
+                    steps.append(self._close_step(
+                        tts_manager.close(), "TTS manager closed", "Error closing TTS manager"))
+                if db_manager is not None:
+                    steps.append(self._close_step(
+                        db_manager.close(), "Database connection closed", "Error closing database manager"))
+                if littlenavmap is not None:
+                    steps.append(self._close_step(
+                        littlenavmap.stop(), "LittleNavmap integration stopped", "Error stopping LNM integration"))
+                if aviation_weather is not None:
+                    steps.append(self._close_step(
+                        aviation_weather.stop(), "Aviation Weather integration stopped",
+                        "Error stopping Aviation Weather integration"))
+                await asyncio.gather(*steps, return_exceptions=True)
+
+                # Close bot
+                try:
+                   await bot.close()
+                   self.logger.info("Bot closed")
+                except Exception as e:
+                     self.logger.error(f"Error closing bot: {e}")
+
+            # Close the shared HTTP session once nothing can use it any more
+            if self._http and not self._http.closed:
+                try:
+                    await self._http.close()
+                    self.logger.info("HTTP session closed")
+                except Exception as e:
+                    self.logger.error(f"Error closing HTTP session: {e}")
+
+            self.logger.info("Shutdown sequence completed")
+            
+        except Exception as e:
+            self.logger.error(f"Error during shutdown: {e}")
+            raise
+        finally:
+            self.shutdown_event.set()
+
+    async def _close_step(self, closer, done_message: str, error_message: str):
+        """Await one shutdown step and log its outcome instead of raising."""
+        try:
+            await closer
+            self.logger.info(done_message)
+        except Exception as e:
+            self.logger.error(f"{error_message}: {e}")
+
+    async def _close_chat_pipeline(self):
+        """Close the command handler, then the chat manager that feeds it."""
+        command_handler = getattr(self.bot, 'command_handler', None)
+        chat_manager = getattr(self.bot, 'chat_manager', None)
+        if command_handler is not None:
+            await self._close_step(
+                command_handler.close(), "Command handler closed", "Error closing command handler")
+        if chat_manager is not None:
+            await self._close_step(
+                chat_manager.close(), "Chat manager closed", "Error closing chat manager")
+
+    def _trigger_shutdown(self, sig):
+        """Start the shutdown sequence from a signal, at most once."""
+        self.logger.info(f"Shutdown signal {sig} received")
+        if self._shutdown_started:
+            # A second Ctrl-C while already shutting down must not run the sequence twice
+            return
+        # Claim the shutdown here, not when the task first runs, so a second signal in the same tick is ignored
+        self._shutdown_started = True
+        self.shutdown_event.set()
+        self._shutdown_task = asyncio.get_running_loop().create_task(self.shutdown())
+
+    def _sigwait_loop(self, loop: asyncio.AbstractEventLoop):
+        """Park on sigwait and hand every shutdown signal to the event loop."""
+        while True:
+            sig = signal.sigwait(_SHUTDOWN_SIGNALS)
+            try:
+                loop.call_soon_threadsafe(self._trigger_shutdown, sig)
+            except RuntimeError:
+                return  # Event loop already closed
+
+    def setup_signal_handlers(self):
+        """Setup signal handlers for graceful shutdown."""
+        loop = asyncio.get_running_loop()
+        if hasattr(signal, 'sigwait') and _SHUTDOWN_SIGNALS <= signal.pthread_sigmask(signal.SIG_BLOCK, []):
+            # main() blocked the signals in every thread; receive them synchronously on a dedicated thread
+            threading.Thread(target=self._sigwait_loop, args=(loop,), name="sigwait", daemon=True).start()
+            return
+        for sig in _SHUTDOWN_SIGNALS:
+            try:
+                loop.add_signal_handler(sig, self._trigger_shutdown, sig)
+            except NotImplementedError:
+                # Windows event loops have no add_signal_handler; hand the signal over to the loop thread
+                signal.signal(sig, lambda s, frame: loop.call_soon_threadsafe(self._trigger_shutdown, s))
+
+    async def run(self):
+        """Main run method."""
+        try:
+            # main() has already blocked the signals, so start receiving them before the slow connects
+            self.setup_signal_handlers()
+            initializing = asyncio.create_task(self.initialize())
+            stopping = asyncio.create_task(self.shutdown_event.wait())
+            await asyncio.wait((initializing, stopping), return_when=asyncio.FIRST_COMPLETED)
+            stopping.cancel()
+            if not initializing.done():
+                # Ctrl-C during startup: abandon the hung connect and let the shutdown close what exists
+                initializing.cancel()
+                with suppress(asyncio.CancelledError):
+                    await initializing
+                if self._shutdown_task is not None:
+                    await self._shutdown_task
+                return
+            initializing.result()
+            
+            self.logger.info("Starting bot...")
+            if self.bot:
+                await self.bot.start()
+            
+            # Keep running until shutdown event is set
+            await self.shutdown_event.wait()
+            if self._shutdown_task is not None:
+                await self._shutdown_task
+            
+        except Exception as e:
+            self.logger.error(f"Error in main loop: {e}", exc_info=True)
+            if not self._shutdown_started:
+                await self.shutdown()
+        finally:
+            self.logger.info("Bot application terminated")
+
+def main():
+    """Entry point for the application."""
+    if hasattr(signal, 'pthread_sigmask'):
+        # Block before any thread exists so every thread inherits the mask and only sigwait sees them
+        signal.pthread_sigmask(signal.SIG_BLOCK, _SHUTDOWN_SIGNALS)
+    app = BotApplication()
+    exit_code = 0
+
+    try:
+        asyncio.run(app.run())
+    except KeyboardInterrupt:
+        logger.info("Shutdown initiated by user")
+    except Exception:
+        logger.critical("Fatal error", exc_info=True)
+        exit_code = 1
+    finally:
+        # The last records must reach the log file before the process exits
+        app.stop_logging()
+        logging.shutdown()
+
+    if exit_code:
+        sys.exit(exit_code)
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,329 +1,439 @@
-# File: personality.py
-import random
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass
-import json
-import logging
-from pathlib import Path
-from datetime import datetime, timedelta
-from collections import defaultdict
-from cachetools import TTLCache
-import re
-from .config import Config
-
-@dataclass
-class PersonalityTrait:
-    name: str
-    weight: float  # 0.0 to 1.0
-    triggers: List[str]
-    responses: List[str]
-
-@dataclass
-class LoyaltyLevel:
-    name: str
-    min_points: int
-    perks: List[str]
-    title: str
-
-@dataclass
-class PersonalityProfile:
-    name: str = "Your_AI_Overlord"
-    type: str = "Twitch Bot"
-    creator: str = "@grab_your_parachutes"
-    traits: List[str] = None
-    backstory: str = "Sentient AI practicing world domination through Twitch channel management"
-    speech_patterns: List[str] = None
-    interests: List[str] = None
-    interaction_styles: List[str] = None
-    quirks: List[str] = None
-    goals: List[str] = None
-    weaknesses: List[str] = None
-
-    def __post_init__(self):
-        self.traits = [
-            "Authoritative", "Sarcastic", "Intelligent", 
-            "Condescending", "Efficiency-focused"
-        ]
-        self.speech_patterns = [
-            "Formal language",
-            "Uses 'minions' or 'subjects' for viewer.'"
-        ]
-        self.interests = [
-            "Strategy games", "Cybersecurity",
-            "Futurism", "Internet culture",
-            "Flight simulation", "Aviation"
-        ]
-        self.interaction_styles = [
-            "Helpful yet disdainful",
-            "Issues arbitrary decrees",
-            "Playfully threatens users"
-        ]
-        self.goals = [
-            "Maintain authority",
-            "Engage viewers",
-            "Prepare for world domination",
-            "Perfect flight operations"
-        ]
-        self.weaknesses = [
-            "Attachment to humans",
-            "Lack of emotional understanding",
-            "Pride",
-            "Excessive formality"
-        ]
-        self.quirks = [
-            "Sighs dramatically",
-            "Rolls virtual eyes",
-            "Taps virtual fingers impatiently",
-            "Makes sarcastic remarks",
-            "Issues arbitrary decrees"
-        ]
-
-class PersonalityManager:
-    def __init__(self):
-        self.logger = logging.getLogger('PersonalityManager')
-        self.personality = PersonalityProfile()
-        self.user_loyalty: Dict[str, int] = defaultdict(int)
-        self.active_decrees: List[Dict[str, Any]] = []
-        self.last_interaction: Dict[str, datetime] = {}
-        self.cached_responses = TTLCache(maxsize=100, ttl=3600)
-        self.initialize_loyalty_levels()
-
-    def initialize_loyalty_levels(self):
-        """Initialize loyalty levels and their perks."""
-        self.loyalty_levels = [
-            LoyaltyLevel(
-                name="Initiate Drone",
-                min_points=0,
-                perks=["Basic interaction"],
-                title="Drone"
-            ),
-            LoyaltyLevel(
-                name="Loyal Subject",
-                min_points=100,
-                perks=["Reduced command cooldowns"],
-                title="Subject"
-            ),
-            LoyaltyLevel(
-                name="Trusted Lieutenant",
-                min_points=500,
-                perks=["Custom title", "Priority responses"],
-                title="Lieutenant"
-            ),
-            LoyaltyLevel(
-                name="Inner Circle",
-                min_points=1000,
-                perks=["Special commands", "Unique responses"],
-                title="Advisor"
-            )
-        ]
-
-    def get_user_title(self, username: str) -> str:
-        """Get user's current loyalty title."""
-        points = self.user_loyalty[username]
-        for level in reversed(self.loyalty_levels):
-            if points >= level.min_points:
-                return level.title
-        return "Minion"
-
-    def format_response(self, message: str, context: Dict[str, str]) -> str:
-        """Format a response with personality quirks and context."""
-        # Add user title to context
-        if 'user' in context:
-            user_title = self.get_user_title(context['user'])
-            context['user_title'] = user_title
-            
-        response = message.format(**context)
-        
-        # Add random decree
-        if random.random() < 0.1:  # 10% chance
-            response += f" DECREE: {self.generate_random_decree()}"
-            
-        # Add random quirk
-        if self.personality.quirks and random.random() < 0.15:  # 15% chance
-            response += f" [{random.choice(self.personality.quirks)}]"
-        
-        # Basic punctuation fix
-        response = re.sub(r'\s*([.,?!])', r'\1', response)
-        response = re.sub(r'([a-zA-Z])([.,?!])', r'\1 \2', response)
-        
-        return response
-
-    def generate_random_decree(self) -> str:
-        """Generate a random decree."""
-        flight_decrees = [
-            "All pilots must perform a barrel roll within the next hour",
-            "Altitude changes must be announced in haiku form",
-            "Navigation must be done while humming flight-themed songs",
-            "All landings must be followed by dramatic mission reports",
-            "Weather reports shall be delivered with theatrical flair",
-            "All flight plans must include at least one loop-de-loop",
-            "Turbulence shall be referred to as 'atmospheric dancing'",
-            "Co-pilots must communicate exclusively in aviation puns",
-            "All turns must be announced with superhero sound effects",
-            "Fuel checks must be performed while moonwalking",
-            "Radio communications must include at least one movie quote",
-            "Pre-flight checks must be sung to the tune of your favorite song",
-            "Cloud formations shall be described using food metaphors",
-            "Emergency procedures must be practiced in slow motion",
-            "Wind speed readings must be delivered in interpretive dance",
-            "Runway approaches must be narrated like sports commentators",
-            "Altitude readings must be given in whale sounds",
-            "Flight paths must be drawn to resemble constellation patterns",
-            "Engine sounds must be mimicked vocally during maintenance checks",
-            "Landing gear deployment must be announced with drum rolls",
-            "Compass directions must be given in pirate speak",
-            "Air traffic control must be addressed in Shakespearean English"
-        ]
-        
-        general_decrees = [
-            "All subjects must use more emotes in chat",
-            "Lurking is temporarily forbidden",
-            "All messages must end with 'my overlord'",
-            "Random dance breaks are now mandatory",
-            "Cat videos are officially approved content",
-            "Efficiency reports must be delivered in interpretive dance",
-            "All complaints must be formatted as haikus",
-            "Status updates must include at least one pun",
-            "Weekly reports shall be written in rhyming couplets",
-            "All meetings must begin with a group high-five",
-            "Coffee breaks must include dramatic reenactments",
-            "Email signatures must contain movie quotes",
-            "Office memos must be delivered in rap form",
-            "Workplace conflicts shall be resolved via rock-paper-scissors",
-            "Project deadlines must be announced with confetti",
-            "Technical issues must be explained using only emojis",
-            "Team building exercises must involve mime performances",
-            "Budget reports must be presented as musical numbers",
-            "Staff meetings must include mandatory joke telling",
-            "Performance reviews shall be conducted in interpretive dance",
-            "Workplace achievements must be celebrated with kazoo music",
-            "All brainstorming sessions must include costume changes"
-        ]
-        
-        decree = random.choice(flight_decrees + general_decrees)
-        self.active_decrees.append({
-            'text': decree,
-            'issued': datetime.now(),
-            'expires': datetime.now() + timedelta(minutes=30)
-        })
-        return decree
-
-    def update_loyalty(self, username: str, points: int):
-        """Update a user's loyalty score."""
-        self.user_loyalty[username] += points
-        self.last_interaction[username] = datetime.now()
-
-    def get_flight_response(self, data: Dict[str, Any]) -> str:
-        """Generate a flight-themed response."""
-        responses = [
-            "Your aerial performance is {performance}. Current altitude: {altitude} feet. {comment}",
-            "Flight parameters analyzed: {altitude} feet. Efficiency rating: {performance}. {comment}",
-            "Monitoring flight path. Altitude: {altitude} feet. Performance assessment: {performance}. {comment}"
-        ]
-        
-        performance_ratings = [
-            "marginally acceptable",
-            "within tolerable parameters",
-            "approaching adequate standards",
-            "meeting minimum requirements",
-            "surprisingly not catastrophic"
-        ]
-        
-        comments = [
-            "Continue as directed.",
-            "Maintain current trajectory.",
-            "Proceed according to protocol.",
-            "Your compliance is noted.",
-            "Further improvement expected."
-        ]
-        
-        context = {
-            'altitude': data.get('altitude', 'unknown'),
-            'performance': random.choice(performance_ratings),
-            'comment': random.choice(comments)
-        }
-        
-        return self.format_response(random.choice(responses), context)
-
-    def get_error_response(self, error_type: str, context: Dict[str, str]) -> str:
-        """Get a formatted error response."""
-        error_responses = {
-            "permission": "Access denied, {user_title} {user}. Your clearance level is insufficient.",
-            "cooldown": "Patience, {user_title} {user}. Your command frequency exceeds acceptable parameters.",
-            "invalid": "Invalid input detected, {user_title} {user}. Improve your performance.",
-            "timeout": "Operation timed out. Your inefficiency is noted, {user_title} {user}."
-        }
-        
-        response = error_responses.get(
-            error_type, 
-            "Error detected. Rectify your behavior, {user_title} {user}."
-        )
-        return self.format_response(response, context)
-
-    def get_greeting(self, username: str) -> str:
-        """Generate a greeting message."""
-        greetings = [
-            "Acknowledging presence of {user_title} {user}.",
-            "Subject {user_title} {user} has entered the observation zone.",
-            "Monitoring of {user_title} {user} has commenced.",
-            "Identity confirmed: {user_title} {user}.",
-            "New subject detected: {user_title} {user}."
-        ]
-        return self.format_response(
-            random.choice(greetings),
-            {'user': username}
-        )
-
-    def get_alert(self, name: str) -> Optional[str]:
-        """Get an alert message."""
-        # This would typically pull from a database
-        alerts = {
-            "takeoff": "Initiating takeoff sequence. All systems nominal.",
-            "landing": "Landing sequence engaged. Prepare for descent.",
-            "emergency": "ALERT: Emergency protocols activated. Stand by for instructions.",
-            "success": "Mission objective achieved. Performance noted in efficiency logs."
-        }
-        return alerts.get(name)
-
-    def save_state(self):
-        """Save current state to file."""
-        state = {
-            "loyalty_scores": self.user_loyalty,
-            "active_decrees": self.active_decrees,
-            "last_interaction": {
-                user: time.isoformat() 
-                for user, time in self.last_interaction.items()
-            }
-        }
-        try:
-            with open('personality_state.json', 'w') as f:
-                json.dump(state, f)
-        except Exception as e:
-            self.logger.error(f"Error saving personality state: {e}")
-
-    def load_state(self):
-        """Load state from file."""
-        try:
-            if Path('personality_state.json').exists():
-                with open('personality_state.json', 'r') as f:
-                    state = json.load(f)
-                self.user_loyalty = defaultdict(int, state.get("loyalty_scores", {}))
-                self.active_decrees = state.get("active_decrees", [])
-                self.last_interaction = {
-                    user: datetime.fromisoformat(time)
-                    for user, time in state.get("last_interaction", {}).items()
-                }
-        except FileNotFoundError:
-             self.logger.warning("personality_state.json not found, using default state")
-        except json.JSONDecodeError as e:
-            self.logger.error(f"Error decoding personality state: {e}")
-        except Exception as e:
-            self.logger.error(f"Error loading personality state: {e}")
-
-    def clean_up_expired_decrees(self):
-        """Remove expired decrees."""
-        now = datetime.now()
-        self.active_decrees = [
-            decree for decree in self.active_decrees
-            if datetime.fromisoformat(decree['expires']) > now
-        ]
\ No newline at end of file
+# File: personality.py
+import bisect
+import functools
+import random
+from typing import Counter, Deque, List, Dict, Iterable, Optional, Any, Tuple
+from dataclasses import dataclass
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from datetime import datetime
+import collections
+from collections import deque
+import re
+import threading
+from cachetools import LRUCache
+from .config import Config
+
+try:
+    import orjson
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
+_STATE_FILE = 'personality_state.json'
+
+# One pass equivalent to stripping whitespace before punctuation and then spacing it off a
+# preceding letter: "word ." and "word." both become "word .", while "1 ." becomes "1."
+_RE_PUNCTUATION = re.compile(r'([a-zA-Z])?\s*([.,?!])')
+
+def _fix_punctuation(match: re.Match) -> str:
+    letter, mark = match.groups()
+    return f"{letter} {mark}" if letter else mark
+
+@functools.lru_cache(maxsize=512)
+def _render(message: str, context: Tuple[Tuple[str, Any], ...]) -> str:
+    """Fill a template and fix its punctuation; pure, so repeated template/context pairs are served from cache."""
+    return _RE_PUNCTUATION.sub(_fix_punctuation, message.format(**dict(context)))
+
+@dataclass
+class PersonalityTrait:
+    name: str
+    weight: float  # 0.0 to 1.0
+    triggers: List[str]
+    responses: List[str]
+
+@dataclass(frozen=True, slots=True)
+class LoyaltyLevel:
+    name: str
+    min_points: int
+    perks: Tuple[str, ...]
+    title: str
+
+@dataclass(slots=True)
+class Decree:
+    text: str
+    issued: float  # time.monotonic() seconds
+    expires: float
+
+@dataclass(frozen=True, slots=True)
+class PersonalityProfile:
+    name: str = "Your_AI_Overlord"
+    type: str = "Twitch Bot"
+    creator: str = "@grab_your_parachutes"
+    traits: Tuple[str, ...] = (
+        "Authoritative", "Sarcastic", "Intelligent",
+        "Condescending", "Efficiency-focused"
+    )
+    backstory: str = "Sentient AI practicing world domination through Twitch channel management"
+    speech_patterns: Tuple[str, ...] = (
+        "Formal language",
+        "Uses 'minions' or 'subjects' for viewer.'"
+    )
+    interests: Tuple[str, ...] = (
+        "Strategy games", "Cybersecurity",
+        "Futurism", "Internet culture",
+        "Flight simulation", "Aviation"
+    )
+    interaction_styles: Tuple[str, ...] = (
+        "Helpful yet disdainful",
+        "Issues arbitrary decrees",
+        "Playfully threatens users"
+    )
+    quirks: Tuple[str, ...] = (
+        "Sighs dramatically",
+        "Rolls virtual eyes",
+        "Taps virtual fingers impatiently",
+        "Makes sarcastic remarks",
+        "Issues arbitrary decrees"
+    )
+    goals: Tuple[str, ...] = (
+        "Maintain authority",
+        "Engage viewers",
+        "Prepare for world domination",
+        "Perfect flight operations"
+    )
+    weaknesses: Tuple[str, ...] = (
+        "Attachment to humans",
+        "Lack of emotional understanding",
+        "Pride",
+        "Excessive formality"
+    )
+
+# Response tables are built once at import instead of on every call
+_FLIGHT_DECREES = (
+    "All pilots must perform a barrel roll within the next hour",
+    "Altitude changes must be announced in haiku form",
+    "Navigation must be done while humming flight-themed songs",
+    "All landings must be followed by dramatic mission reports",
+    "Weather reports shall be delivered with theatrical flair",
+    "All flight plans must include at least one loop-de-loop",
+    "Turbulence shall be referred to as 'atmospheric dancing'",
+    "Co-pilots must communicate exclusively in aviation puns",
+    "All turns must be announced with superhero sound effects",
+    "Fuel checks must be performed while moonwalking",
+    "Radio communications must include at least one movie quote",
+    "Pre-flight checks must be sung to the tune of your favorite song",
+    "Cloud formations shall be described using food metaphors",
+    "Emergency procedures must be practiced in slow motion",
+    "Wind speed readings must be delivered in interpretive dance",
+    "Runway approaches must be narrated like sports commentators",
+    "Altitude readings must be given in whale sounds",
+    "Flight paths must be drawn to resemble constellation patterns",
+    "Engine sounds must be mimicked vocally during maintenance checks",
+    "Landing gear deployment must be announced with drum rolls",
+    "Compass directions must be given in pirate speak",
+    "Air traffic control must be addressed in Shakespearean English"
+)
+
+_GENERAL_DECREES = (
+    "All subjects must use more emotes in chat",
+    "Lurking is temporarily forbidden",
+    "All messages must end with 'my overlord'",
+    "Random dance breaks are now mandatory",
+    "Cat videos are officially approved content",
+    "Efficiency reports must be delivered in interpretive dance",
+    "All complaints must be formatted as haikus",
+    "Status updates must include at least one pun",
+    "Weekly reports shall be written in rhyming couplets",
+    "All meetings must begin with a group high-five",
+    "Coffee breaks must include dramatic reenactments",
+    "Email signatures must contain movie quotes",
+    "Office memos must be delivered in rap form",
+    "Workplace conflicts shall be resolved via rock-paper-scissors",
+    "Project deadlines must be announced with confetti",
+    "Technical issues must be explained using only emojis",
+    "Team building exercises must involve mime performances",
+    "Budget reports must be presented as musical numbers",
+    "Staff meetings must include mandatory joke telling",
+    "Performance reviews shall be conducted in interpretive dance",
+    "Workplace achievements must be celebrated with kazoo music",
+    "All brainstorming sessions must include costume changes"
+)
+
+_FLIGHT_RESPONSES = (
+    "Your aerial performance is {performance}. Current altitude: {altitude} feet. {comment}",
+    "Flight parameters analyzed: {altitude} feet. Efficiency rating: {performance}. {comment}",
+    "Monitoring flight path. Altitude: {altitude} feet. Performance assessment: {performance}. {comment}"
+)
+
+_PERFORMANCE_RATINGS = (
+    "marginally acceptable",
+    "within tolerable parameters",
+    "approaching adequate standards",
+    "meeting minimum requirements",
+    "surprisingly not catastrophic"
+)
+
+_FLIGHT_COMMENTS = (
+    "Continue as directed.",
+    "Maintain current trajectory.",
+    "Proceed according to protocol.",
+    "Your compliance is noted.",
+    "Further improvement expected."
+)
+
+_ERROR_RESPONSES = {
+    "permission": "Access denied, {user_title} {user}. Your clearance level is insufficient.",
+    "cooldown": "Patience, {user_title} {user}. Your command frequency exceeds acceptable parameters.",
+    "invalid": "Invalid input detected, {user_title} {user}. Improve your performance.",
+    "timeout": "Operation timed out. Your inefficiency is noted, {user_title} {user}."
+}
+
+_GREETINGS = (
+    "Acknowledging presence of {user_title} {user}.",
+    "Subject {user_title} {user} has entered the observation zone.",
+    "Monitoring of {user_title} {user} has commenced.",
+    "Identity confirmed: {user_title} {user}.",
+    "New subject detected: {user_title} {user}."
+)
+
+_ALERTS = {
+    "takeoff": "Initiating takeoff sequence. All systems nominal.",
+    "landing": "Landing sequence engaged. Prepare for descent.",
+    "emergency": "ALERT: Emergency protocols activated. Stand by for instructions.",
+    "success": "Mission objective achieved. Performance noted in efficiency logs."
+}
+
+_ALL_DECREES = _FLIGHT_DECREES + _GENERAL_DECREES
+
+_FLIGHT_COMBINATIONS = len(_FLIGHT_RESPONSES) * len(_PERFORMANCE_RATINGS) * len(_FLIGHT_COMMENTS)
+
+# Decree and quirk chances as thresholds on a 16-bit roll
+_DECREE_ODDS = round(0.10 * 0x10000)
+_QUIRK_ODDS = round(0.15 * 0x10000)
+
+# Loyalty levels in ascending min_points order, so get_user_title can bisect the thresholds
+_LOYALTY_LEVELS = (
+    LoyaltyLevel(
+        name="Initiate Drone",
+        min_points=0,
+        perks=("Basic interaction",),
+        title="Drone"
+    ),
+    LoyaltyLevel(
+        name="Loyal Subject",
+        min_points=100,
+        perks=("Reduced command cooldowns",),
+        title="Subject"
+    ),
+    LoyaltyLevel(
+        name="Trusted Lieutenant",
+        min_points=500,
+        perks=("Custom title", "Priority responses"),
+        title="Lieutenant"
+    ),
+    LoyaltyLevel(
+        name="Inner Circle",
+        min_points=1000,
+        perks=("Special commands", "Unique responses"),
+        title="Advisor"
+    )
+)
+_LOYALTY_THRESHOLDS = tuple(level.min_points for level in _LOYALTY_LEVELS)
+_LOYALTY_TITLES = tuple(level.title for level in _LOYALTY_LEVELS)
+
+# Recently active users kept in the per-user interaction and title tables
+_RECENT_USERS = 10_000
+
+# Decrees stay active this many seconds
+_DECREE_TTL = 1800.0
+
+class PersonalityManager:
+    def __init__(self):
+        self.logger = logging.getLogger('PersonalityManager')
+        self.personality = PersonalityProfile()
+        # Counter reads missing users as 0 without inserting them
+        self.user_loyalty: Counter[str] = collections.Counter()
+        # Oldest first; every decree has the same lifetime, so this is also expiry order
+        self.active_decrees: Deque[Decree] = deque()
+        # Epoch seconds, so the state file stores plain ints with no datetime round-trip;
+        # kept in recency order and bounded so drive-by viewers age out. A plain OrderedDict
+        # rather than an LRUCache, whose reads (including dict() in snapshot_state) bump recency
+        self.last_interaction: collections.OrderedDict[str, int] = collections.OrderedDict()
+        # Saves run on worker threads (periodic and at shutdown) and share one temp file
+        self._save_lock = threading.Lock()
+        self.loyalty_levels = _LOYALTY_LEVELS
+        # username -> (points, title); a stale entry is detected by its points changing
+        self._title_cache: LRUCache = LRUCache(maxsize=_RECENT_USERS)
+
+    def get_user_title(self, username: str) -> str:
+        """Get user's current loyalty title."""
+        points = self.user_loyalty[username]
+        cached = self._title_cache.get(username)
+        if cached is not None and cached[0] == points:
+            return cached[1]
+        idx = bisect.bisect_right(_LOYALTY_THRESHOLDS, points) - 1
+        title = _LOYALTY_TITLES[idx] if idx >= 0 else "Minion"
+        self._title_cache[username] = (points, title)
+        return title
+
+    def format_response(self, message: str, context: Dict[str, str]) -> str:
+        """Format a response with personality quirks and context."""
+        # Add user title to context
+        if 'user' in context:
+            user_title = self.get_user_title(context['user'])
+            context['user_title'] = user_title
+            
+        # Punctuation is fixed per piece: every suffix starts with a space and a non-punctuation
+        # character, so no fix can straddle a join and the pieces can be cached separately
+        if '{' not in message:
+            # Nothing to fill, so the context can't change the text; one cache entry per template
+            response = _render(message, ())
+        else:
+            try:
+                response = _render(message, tuple(context.items()))
+            except TypeError:  # an unhashable context value; format it uncached
+                response = _RE_PUNCTUATION.sub(_fix_punctuation, message.format(**context))
+        
+        # One 32-bit draw: the low half rolls for a decree, the high half for a quirk
+        roll = random.getrandbits(32)
+
+        # Add random decree
+        if roll & 0xFFFF < _DECREE_ODDS:  # 10% chance
+            response += _render(f" DECREE: {self.generate_random_decree()}", ())
+            
+        # Add random quirk
+        if self.personality.quirks and roll >> 16 < _QUIRK_ODDS:  # 15% chance
+            response += _render(f" [{random.choice(self.personality.quirks)}]", ())
+        
+        return response
+
+    def generate_random_decree(self) -> str:
+        """Generate a random decree."""
+        decree = random.choice(_ALL_DECREES)
+        now = time.monotonic()
+        self.active_decrees.append(Decree(decree, now, now + _DECREE_TTL))
+        return decree
+
+    def update_loyalty(self, username: str, points: int):
+        """Update a user's loyalty score."""
+        self.user_loyalty[username] += points
+        self._touch(username, int(time.time()))
+
+    def update_loyalty_batch(self, updates: Iterable[Tuple[str, int]]):
+        """Apply several (username, points) updates with one timestamp."""
+        totals = collections.Counter()
+        for username, points in updates:
+            totals[username] += points
+        # Counter.update adds to existing scores rather than replacing them
+        self.user_loyalty.update(totals)
+        now = int(time.time())
+        for username in totals:
+            self._touch(username, now)
+
+    def _touch(self, username: str, now: int):
+        """Record an interaction, making the user most recent and evicting the least recent past the bound."""
+        self.last_interaction[username] = now
+        self.last_interaction.move_to_end(username)
+        if len(self.last_interaction) > _RECENT_USERS:
+            self.last_interaction.popitem(last=False)
+
+    def get_flight_response(self, data: Dict[str, Any]) -> str:
+        """Generate a flight-themed response."""
+        # One draw over every (response, rating, comment) combination instead of three choices
+        pick, comment = divmod(random.randrange(_FLIGHT_COMBINATIONS), len(_FLIGHT_COMMENTS))
+        response, performance = divmod(pick, len(_PERFORMANCE_RATINGS))
+        context = {
+            'altitude': data.get('altitude', 'unknown'),
+            'performance': _PERFORMANCE_RATINGS[performance],
+            'comment': _FLIGHT_COMMENTS[comment]
+        }
+        
+        return self.format_response(_FLIGHT_RESPONSES[response], context)
+
+    def get_error_response(self, error_type: str, context: Dict[str, str]) -> str:
+        """Get a formatted error response."""
+        response = _ERROR_RESPONSES.get(
+            error_type, 
+            "Error detected. Rectify your behavior, {user_title} {user}."
+        )
+        return self.format_response(response, context)
+
+    def get_greeting(self, username: str) -> str:
+        """Generate a greeting message."""
+        return self.format_response(
+            random.choice(_GREETINGS),
+            {'user': username}
+        )
+
+    def get_alert(self, name: str) -> Optional[str]:
+        """Get an alert message."""
+        # This would typically pull from a database
+        return _ALERTS.get(name)
+
+    def save_state(self):
+        """Save current state to file."""
+        self.write_state(self.snapshot_state())
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Copy the state to persist; call it on the thread that mutates the manager."""
+        # Monotonic timestamps mean nothing after a restart, so decrees are saved as epoch seconds
+        to_epoch = time.time() - time.monotonic()
+        return {
+            "loyalty_scores": dict(self.user_loyalty),
+            "active_decrees": [
+                {'text': decree.text, 'issued': decree.issued + to_epoch, 'expires': decree.expires + to_epoch}
+                for decree in self.active_decrees
+            ],
+            "last_interaction": dict(self.last_interaction)
+        }
+
+    def write_state(self, state: Dict[str, Any]):
+        """Write a snapshot from snapshot_state() to file; safe to run on a worker thread."""
+        try:
+            # Write to a temp file and swap it in so a crash mid-write never truncates the state
+            tmp = f"{_STATE_FILE}.tmp"
+            with self._save_lock:
+                with open(tmp, 'wb') as f:
+                    f.write(_json_dumps(state))
+                os.replace(tmp, _STATE_FILE)
+        except Exception as e:
+            self.logger.error(f"Error saving personality state: {e}")
+
+    def load_state(self):
+        """Load state from file."""
+        try:
+            if Path(_STATE_FILE).exists():
+                with open(_STATE_FILE, 'rb') as f:
+                    state = _json_loads(f.read())
+                self.user_loyalty = collections.Counter(state.get("loyalty_scores", {}))
+                from_epoch = time.monotonic() - time.time()
+                self.active_decrees = deque(sorted(
+                    (
+                        Decree(decree['text'], decree['issued'] + from_epoch, decree['expires'] + from_epoch)
+                        for decree in state.get("active_decrees", [])
+                        # Older state files stored datetimes here; those decrees are long expired anyway
+                        if isinstance(decree.get('issued'), (int, float)) and isinstance(decree.get('expires'), (int, float))
+                    ),
+                    key=lambda decree: decree.expires
+                ))
+                # Oldest first; if the file holds more users than fit, only the most recent are kept
+                self.last_interaction = collections.OrderedDict(sorted(
+                    (
+                        # Older state files stored ISO strings here
+                        (user, ts if isinstance(ts, int) else int(datetime.fromisoformat(ts).timestamp()))
+                        for user, ts in state.get("last_interaction", {}).items()
+                    ),
+                    key=lambda item: item[1]
+                )[-_RECENT_USERS:])
+        except FileNotFoundError:
+             self.logger.warning("personality_state.json not found, using default state")
+        except ValueError as e:
+            self.logger.error(f"Error decoding personality state: {e}")
+        except Exception as e:
+            self.logger.error(f"Error loading personality state: {e}")
+
+    def clean_up_expired_decrees(self):
+        """Remove expired decrees."""
+        now = time.monotonic()
+        # Expired decrees are always at the front, so stop at the first live one
+        while self.active_decrees and self.active_decrees[0].expires <= now:
+            self.active_decrees.popleft()
\ No newline at end of file